@@ -0,0 +1,295 @@
+import argparse, itertools, os, tempfile, time, tracemalloc
+from typing import Callable, Dict
+import numpy as np
+from steg_utils import codecs, encryption, engines, frames, image_ops, pipeline, utils
+
+# ---- helpers ----
+def _best_of(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+def _random_channel(side: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (side, side), dtype=np.uint8)
+def _traced_peak(fn: Callable) -> int:
+    tracemalloc.start()
+    try:
+        fn(); return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+def _random_payload(n: int, seed: int = 1) -> bytes:
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+# ---- suites ----
+def bench_engines(side: int, bpp: int, repeat: int) -> None:
+    """Embed/extract time per engine at ~90% capacity, with a round-trip check."""
+    channel = _random_channel(side)
+    payload = _random_payload(int(side * side * bpp * 0.9) // 8)
+    nbits = len(payload) * 8
+    print(f"engines: {side}x{side}, bpp={bpp}, payload={len(payload)} B")
+    print("engine   |  embed (ms) | extract (ms)")
+    print("-" * 38)
+    for name in engines.ENGINES:
+        stego = engines.embed_payload(channel, payload, bpp, engine=name)
+        assert engines.extract_payload_bits(stego, nbits, bpp, engine=name) == payload, name
+        t_emb = _best_of(lambda: engines.embed_payload(channel, payload, bpp, engine=name), repeat)
+        t_ext = _best_of(lambda: engines.extract_payload_bits(stego, nbits, bpp, engine=name), repeat)
+        print(f"{name:<8} | {t_emb * 1e3:11.2f} | {t_ext * 1e3:12.2f}")
+
+def bench_cover_cache(cover: str, repeat: int) -> None:
+    """PNG decode vs. decoded-cover cache hit."""
+    image_ops.clear_image_cache()
+    image_ops.load_image_cached(cover)
+    t_dec = _best_of(lambda: image_ops.load_image(cover), repeat)
+    t_hit = _best_of(lambda: image_ops.load_image_cached(cover), repeat)
+    print(f"cover_cache: {cover}")
+    print(f"decode {t_dec * 1e3:.3f} ms | cache hit {t_hit * 1e3:.3f} ms | {image_ops.image_cache_stats()}")
+
+CODEC_SETTINGS = [("png", {})] + [("png", {"compress_level": l}) for l in (0, 1, 9)] + \
+    [("png-fast", {"compress_level": l, "png_filter": f}) for l in (1, 6) for f in ("none", "sub", "paeth")] + \
+    [("png-cv2", {"compress_level": 1}), ("webp", {"method": 0}), ("webp", {"method": 4}), ("npy", {})]
+
+def bench_codecs(cover: str, repeat: int) -> None:
+    """Encoded size vs. encode time for each output codec setting."""
+    img = np.ascontiguousarray(image_ops.load_image(cover))
+    print(f"codecs: {cover} ({img.nbytes} B raw)")
+    print("codec     | options                                      |   size (B) | encode (ms)")
+    print("-" * 84)
+    for codec, opts in CODEC_SETTINGS:
+        try:
+            data = codecs.encode_image(img, codec, **opts)
+        except RuntimeError as e:   # optional encoder missing
+            print(f"{codec:<9} | skipped: {e}"); continue
+        assert np.array_equal(codecs.decode_image(data), img), (codec, opts)
+        t = _best_of(lambda: codecs.encode_image(img, codec, **opts), repeat)
+        print(f"{codec:<9} | {str(opts):<44} | {len(data):10d} | {t * 1e3:11.2f}")
+
+def bench_modes(cover: str, bpp: int, repeat: int) -> None:
+    """hide/reveal time for the plain and red-difference payload modes."""
+    rgb = np.ascontiguousarray(image_ops.load_image(cover))
+    msg = _random_payload((rgb.shape[0] * rgb.shape[1] * bpp // 8 - pipeline.HEADER_BYTES) // 2)
+    red = image_ops.flip_transpose(rgb)[:, :, 0].ravel()
+    print(f"modes: {cover}, bpp={bpp}, message={len(msg)} B")
+    print("mode     |   hide (ms) | reveal (ms)")
+    print("-" * 38)
+    for mode in pipeline.MODES:
+        png = pipeline.hide(rgb, msg, "bench", bpp, mode=mode, codec="npy")
+        assert pipeline.reveal(png, "bench", bpp, mode=mode) == msg, mode
+        t_hide = _best_of(lambda: pipeline.hide(rgb, msg, "bench", bpp, mode=mode, codec="npy"), repeat)
+        t_rev = _best_of(lambda: pipeline.reveal(png, "bench", bpp, mode=mode), repeat)
+        print(f"{mode:<8} | {t_hide * 1e3:11.2f} | {t_rev * 1e3:11.2f}")
+    t_vec = _best_of(lambda: pipeline.red_diff_decode(msg, red), repeat)
+    t_gen = _best_of(lambda: bytes(((msg[i] + int(red[i])) % 256) for i in range(len(msg))), 1)
+    print(f"red-diff decode only: vectorized {t_vec * 1e3:.3f} ms | per-byte generator {t_gen * 1e3:.2f} ms")
+
+# peak allocation limits, as multiples of the decoded image size; checked from
+# 256x256 up, below that fixed per-call overhead dominates. "cold" is the first
+# call for a cover size (index cache cleared), which also builds the int32
+# visiting order (4 B per pixel, 1.33x the RGB image); "warm" reuses it.
+def bench_memory(side: int, bpp: int) -> None:
+    """
+    tracemalloc peak of one embed (cold and warm index cache), as a multiple of
+    the decoded image size. The limits are asserted in tests/test_memory.py.
+    """
+    rgb = np.random.default_rng(0).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    cipher = _random_payload(side * side * bpp // 8 - pipeline.HEADER_BYTES)
+    work = rgb.copy()
+    print(f"memory: {side}x{side}x3 ({rgb.nbytes} B), bpp={bpp}, full-capacity payload")
+    print("engine | path       | cold (B)    | x image | warm (B)    | x image")
+    print("-" * 66)
+    for engine in engines.ENGINES:
+        runs = [
+            ("standard", lambda: pipeline.embed_array(rgb, cipher, "bench", bpp, engine)),
+            ("low_memory", lambda: pipeline.embed_array(rgb, cipher, "bench", bpp, engine, low_memory=True)),
+            ("inplace", lambda: pipeline.embed_array_inplace(work, cipher, "bench", bpp, engine)),
+        ]
+        for name, fn in runs:
+            utils.clear_index_cache()
+            cold = _traced_peak(fn) / rgb.nbytes
+            warm = _traced_peak(fn) / rgb.nbytes
+            print(f"{engine:<6} | {name:<10} | {int(cold * rgb.nbytes):11d} | {cold:7.2f} | "
+                  f"{int(warm * rgb.nbytes):11d} | {warm:7.2f}")
+
+def bench_threads(side: int, bpp: int, repeat: int) -> None:
+    """Near-capacity embed/extract speedup at 1/2/4/8 worker threads (bit-identical output)."""
+    rgb = np.random.default_rng(0).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    cipher = _random_payload(side * side * bpp // 8 - pipeline.HEADER_BYTES)
+    ref = pipeline.embed_array(rgb, cipher, "bench", bpp)
+    print(f"threads: {side}x{side}, bpp={bpp}, payload={len(cipher)} B")
+    print("workers |  embed (ms) | low_memory (ms) | extract (ms) | speedup (embed/low/extract)")
+    print("-" * 88)
+    base = None
+    for workers in (1, 2, 4, 8):
+        assert np.array_equal(pipeline.embed_array(rgb, cipher, "bench", bpp, workers=workers), ref)
+        assert np.array_equal(pipeline.embed_array(rgb, cipher, "bench", bpp, low_memory=True, workers=workers), ref)
+        assert pipeline.extract_array(ref, "bench", bpp, workers=workers) == cipher
+        t = (_best_of(lambda: pipeline.embed_array(rgb, cipher, "bench", bpp, workers=workers), repeat),
+             _best_of(lambda: pipeline.embed_array(rgb, cipher, "bench", bpp, low_memory=True, workers=workers), repeat),
+             _best_of(lambda: pipeline.extract_array(ref, "bench", bpp, workers=workers), repeat))
+        base = base or t
+        speed = "/".join(f"{b / x:.2f}x" for b, x in zip(base, t))
+        print(f"{workers:7d} | {t[0] * 1e3:11.1f} | {t[1] * 1e3:15.1f} | {t[2] * 1e3:12.1f} | {speed}")
+
+def bench_verify(cover: str, bpp: int, repeat: int) -> None:
+    """Overhead of in-memory verification over the same path unverified (runs interleaved, best of)."""
+    rgb = np.ascontiguousarray(image_ops.load_image(cover))
+    msg = _random_payload((rgb.shape[0] * rgb.shape[1] * bpp // 8 - pipeline.HEADER_BYTES) // 2)
+    png = pipeline.hide(rgb, msg, "bench", bpp)
+    cipher = pipeline.extract_array(codecs.decode_image(png), "bench", bpp)
+    decoded = codecs.decode_image(png)
+    pairs = [
+        ("hide", lambda v: pipeline.hide(rgb, msg, "bench", bpp, verify=v)),
+        ("hide verify_encoded", lambda v: pipeline.hide(rgb, msg, "bench", bpp, verify=v, verify_encoded=v)),
+        ("embed_array", lambda v: pipeline.embed_array(rgb, cipher, "bench", bpp, verify=v)),
+        ("embed_array low_memory", lambda v: pipeline.embed_array(rgb, cipher, "bench", bpp, low_memory=True, verify=v)),
+    ]
+    print(f"verify: {cover}, bpp={bpp}, message={len(msg)} B")
+    print("path                   |  plain (ms) | verified (ms) | overhead")
+    print("-" * 63)
+    for name, fn in pairs:
+        best = {False: float("inf"), True: float("inf")}
+        for _ in range(max(repeat, 5)):
+            for v in (False, True):
+                best[v] = min(best[v], _best_of(lambda: fn(v), 1))
+        print(f"{name:<22} | {best[False] * 1e3:11.2f} | {best[True] * 1e3:13.2f} | {best[True] / best[False] * 100 - 100:+7.1f}%")
+    t_ext = _best_of(lambda: pipeline.extract_array(decoded, "bench", bpp), repeat)
+    t_ver = _best_of(lambda: pipeline.verify_array(decoded, cipher, "bench", bpp), repeat)
+    print(f"verify_array on a decoded image: {t_ver * 1e3:.2f} ms (extract_array: {t_ext * 1e3:.2f} ms)")
+
+def bench_frames(side: int, bpp: int, repeat: int, n_frames: int = 8) -> None:
+    """Streamed frame-sequence hide/reveal throughput at 1/2/4 workers (frame directory, fast PNG)."""
+    src = [np.random.default_rng(i).integers(0, 256, (side, side, 3), dtype=np.uint8) for i in range(n_frames)]
+    msg = _random_payload(frames.frame_capacity((side, side), bpp) * n_frames - 64)
+    print(f"frames: {n_frames} x {side}x{side}, bpp={bpp}, message={len(msg)} B")
+    print("workers |   hide (ms) | reveal (ms) | MB/s (hide)")
+    print("-" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (1, 2, 4):
+            out = os.path.join(tmp, f"w{workers}")
+            run = lambda: frames.hide_frames(src, msg, "bench", out, bpp, workers=workers, codec="png-fast")
+            run()
+            assert frames.reveal_frames(out, "bench", bpp, workers=workers) == msg
+            t_hide = _best_of(run, repeat)
+            t_rev = _best_of(lambda: frames.reveal_frames(out, "bench", bpp, workers=workers), repeat)
+            print(f"{workers:7d} | {t_hide * 1e3:11.1f} | {t_rev * 1e3:11.1f} | {len(msg) / t_hide / 1e6:11.2f}")
+
+def bench_update(cover: str, bpp: int, repeat: int) -> None:
+    """In-place payload update vs. a fresh embed as the fraction of changed cipher bytes grows."""
+    rgb = np.ascontiguousarray(image_ops.load_image(cover))
+    cipher = _random_payload((rgb.shape[0] * rgb.shape[1] * bpp // 8 - pipeline.HEADER_BYTES) // 2)
+    base = pipeline.embed_array(rgb, cipher, "bench", bpp)
+    rng = np.random.default_rng(2)
+    t_full = _best_of(lambda: pipeline.embed_array(rgb, cipher, "bench", bpp), repeat)
+    print(f"update: {cover}, bpp={bpp}, cipher={len(cipher)} B, full embed {t_full * 1e3:.2f} ms")
+    print("changed B | changed slots |  update (ms) | vs embed")
+    print("-" * 50)
+    for n in (0, 16, len(cipher) // 100, len(cipher) // 10, len(cipher)):
+        new = bytearray(cipher)
+        for i in rng.choice(len(cipher), n, replace=False):
+            new[i] ^= 0xFF
+        new = bytes(new)
+        stego, stats = pipeline.update_array(base, new, "bench", bpp)
+        assert (stego == pipeline.embed_array(rgb, new, "bench", bpp)).all()
+        work, nxt = base.copy(), itertools.cycle([new, cipher]).__next__
+        # alternate new <-> original so every timed call rewrites the same n bytes
+        t = _best_of(lambda: pipeline.update_array(work, nxt(), "bench", bpp, in_place=True), repeat)
+        print(f"{n:9d} | {stats['changed_slots']:13d} | {t * 1e3:12.2f} | {t / t_full * 100:7.1f}%")
+
+def bench_metrics(cover: str, repeat: int, n_stegos: int = 8) -> None:
+    """Per-pair mse/ncc/ssim_index vs. a cached CoverStats vs. one score_batch over N stegos."""
+    import metrics                              # needs cv2 and scikit-image
+    rgb = np.ascontiguousarray(image_ops.load_image(cover))
+    cap = rgb.shape[0] * rgb.shape[1] // 8 - pipeline.HEADER_BYTES
+    stegos = [pipeline.embed_array(rgb, _random_payload(cap * (i + 1) // (n_stegos + 1), seed=i), f"k{i}")
+              for i in range(n_stegos)]
+    stats = metrics.CoverStats(rgb)
+    batch = stats.score_batch(stegos)
+    for i, st in enumerate(stegos):
+        assert abs(batch["SSIM"][i] - metrics.ssim_index(rgb, st)) < 1e-9
+        assert abs(batch["NCC"][i] - metrics.ncc(rgb, st)) < 1e-9 and batch["MSE"][i] == metrics.mse(rgb, st)
+    per_pair = lambda c: [(metrics.mse(c, st), metrics.ncc(c, st), metrics.ssim_index(c, st)) for st in stegos]
+    runs = [
+        ("per pair (cover arrays)", lambda: per_pair(rgb)),
+        ("per pair (CoverStats)", lambda: per_pair(stats)),
+        ("CoverStats + score_batch", lambda: metrics.CoverStats(rgb).score_batch(stegos)),
+        ("score_batch (cached)", lambda: stats.score_batch(stegos)),
+    ]
+    print(f"metrics: {cover}, {n_stegos} stegos")
+    print("path                     |   total (ms) | per stego (ms)")
+    print("-" * 58)
+    for name, fn in runs:
+        t = _best_of(fn, repeat)
+        print(f"{name:<24} | {t * 1e3:12.1f} | {t / n_stegos * 1e3:14.2f}")
+
+def bench_keystream(repeat: int, sizes=(1 << 16, 1 << 20, 1 << 24)) -> None:
+    """Keystream generation and mle_encrypt throughput per keystream mode, with seek checks."""
+    print("keystream: MB/s for _key_stream / mle_encrypt, peak alloc as a multiple of length")
+    print("mode            |     bytes | keystream MB/s | encrypt MB/s | peak")
+    print("-" * 68)
+    for mode in encryption.KEYSTREAMS:
+        full = encryption._key_stream("bench", 4096, mode)
+        assert all(encryption._key_stream("bench", 1000, mode, o) == full[o:o + 1000] for o in (1, 33, 64, 3000))
+        for n in sizes:
+            plain = _random_payload(n)
+            t_ks = _best_of(lambda: encryption._key_stream("bench", n, mode), repeat)
+            t_enc = _best_of(lambda: encryption.mle_encrypt(plain, "bench", mode), repeat)
+            peak = _traced_peak(lambda: encryption._key_stream("bench", n, mode))
+            print(f"{mode:<15} | {n:9d} | {n / t_ks / 1e6:14.1f} | {n / t_enc / 1e6:12.1f} | {peak / n:4.2f}x")
+
+def bench_multikey(cover: str, bpp: int, repeat: int, workers: int = 4) -> None:
+    """Candidate-key search: reveal per key vs. reveal_many grouped by quadrant permutation."""
+    rgb = np.ascontiguousarray(image_ops.load_image(cover))
+    msg = _random_payload((rgb.shape[0] * rgb.shape[1] * bpp // 8 - pipeline.HEADER_BYTES) // 4)
+    png = pipeline.hide(rgb, msg, "real", bpp)
+    print(f"multikey: {cover}, bpp={bpp}, message={len(msg)} B, reveal_many workers={workers}")
+    print("keys | reveal loop (ms) | reveal_many (ms) | per key (ms)")
+    print("-" * 58)
+    for n in (1, 24, 100, 1000):
+        keys = [f"cand{i}" for i in range(n - 1)] + ["real"]
+        assert pipeline.reveal_many(png, keys, bpp, workers=workers)["real"] == msg
+        t_many = _best_of(lambda: pipeline.reveal_many(png, keys, bpp, workers=workers), repeat)
+        loop = "-"
+        if n <= 100:
+            def reveal_each():
+                for key in keys:
+                    try:
+                        pipeline.reveal(png, key, bpp)
+                    except ValueError:
+                        pass
+            loop = f"{_best_of(reveal_each, repeat) * 1e3:.1f}"
+        print(f"{n:4d} | {loop:>16} | {t_many * 1e3:16.1f} | {t_many / n * 1e3:12.3f}")
+
+SUITES: Dict[str, Callable] = {
+    "engines": lambda a: bench_engines(a.side, a.bpp, a.repeat),
+    "cover_cache": lambda a: bench_cover_cache(a.cover, a.repeat),
+    "codecs": lambda a: bench_codecs(a.cover, a.repeat),
+    "modes": lambda a: bench_modes(a.cover, a.bpp, a.repeat),
+    "memory": lambda a: bench_memory(a.side, a.bpp),
+    "threads": lambda a: bench_threads(a.side, a.bpp, a.repeat),
+    "verify": lambda a: bench_verify(a.cover, a.bpp, a.repeat),
+    "frames": lambda a: bench_frames(a.side, a.bpp, a.repeat),
+    "update": lambda a: bench_update(a.cover, a.bpp, a.repeat),
+    "metrics": lambda a: bench_metrics(a.cover, a.repeat),
+    "keystream": lambda a: bench_keystream(a.repeat),
+    "multikey": lambda a: bench_multikey(a.cover, a.bpp, a.repeat),
+}
+
+# ---- CLI ----
+def main():
+    ap = argparse.ArgumentParser(description="Micro-benchmarks for the embedding pipeline")
+    ap.add_argument("suites", nargs="*", default=list(SUITES), help=f"any of {list(SUITES)}")
+    ap.add_argument("--cover", default="input/cover.png")
+    ap.add_argument("--side", type=int, default=512)
+    ap.add_argument("--bpp", type=int, default=1, choices=[1, 2, 3, 4])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    unknown = [s for s in args.suites if s not in SUITES]
+    if unknown:
+        ap.error(f"unknown suite(s) {unknown}, choose from {list(SUITES)}")
+    for name in args.suites:
+        SUITES[name](args); print()
+
+if __name__ == "__main__":
+    main()
+
+#python benchmark.py engines --side 1024 --bpp 2
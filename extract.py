@@ -1,32 +1,13 @@
 from pathlib import Path
-from steg_utils import image_ops, encryption, utils
+from steg_utils import image_ops, pipeline, utils
 
 OUTPUT_DIR = Path("output")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 def extract_text_from_image(stego_path: str, key: str, bits_per_pixel: int = 2):
+    """Red-difference mode: pair with `python main.py hide --mode reddiff`."""
     img = image_ops.load_image(stego_path)
-    proc = image_ops.flip_transpose(img)
-    r, g, b = image_ops.split_rgb(proc)
-
-    perm = utils.generate_perm_from_key(key)
-    shuffled_view_for_read = utils.make_shuffled_blue(b, perm)
-
-    header_bits = 32
-    header_bytes = utils.extract_bits_from_channel(shuffled_view_for_read, header_bits, bits_per_pixel=bits_per_pixel)
-    cipher_len = int.from_bytes(header_bytes, "big")
-
-    total_bits_to_read = header_bits + cipher_len * 8
-    combined = utils.extract_bits_from_channel(shuffled_view_for_read, total_bits_to_read, bits_per_pixel=bits_per_pixel)
-    cipher_bytes = combined[4:4 + cipher_len]
-
-    caldiff = encryption.mle_decrypt(cipher_bytes, key)
-
-    red_flat = r.flatten()
-    if len(caldiff) > red_flat.size:
-        raise ValueError("Unexpected: decrypted payload larger than red pixel count used.")
-
-    msg_bytes = bytes(((caldiff[i] + int(red_flat[i])) % 256) for i in range(len(caldiff)))
+    msg_bytes = pipeline.reveal(img, key, bits_per_pixel=bits_per_pixel, mode="reddiff")
     text = utils.bytes_to_text(msg_bytes)
 
     out = OUTPUT_DIR / "decrypted.txt"
@@ -1,6 +1,7 @@
+import argparse
 import sys
 from pathlib import Path
-from steg_utils import encryption, image_ops, utils
+from steg_utils import codecs, encryption, engines, frames, image_ops, pipeline, utils
 from histogram import plot_side_by_side_hist
 from rs_analysis import rs_analysis
 from pdh_plot import plot_pdh
@@ -36,36 +37,15 @@ def decrypt_text_file(enc_file: str, key: str, out_file: str = "output/decrypted
     print("--------------------------------------------------")
     return text
 
-def embed_text_into_image(cover_path: str, enc_file: str, key: str, bits_per_pixel: int = 1):
-    img = image_ops.load_image(cover_path)
-    proc = image_ops.flip_transpose(img)
-    r, g, b = image_ops.split_rgb(proc)
-    h, w = b.shape
-
-    # Split + shuffle blue
-    blocks, split_indices = image_ops.split_blue_blocks(b)
-    perm = utils.generate_perm_from_key(key)
-    shuffled = [blocks[p] for p in perm]
-    shuffled_blue = image_ops.combine_blue_blocks(shuffled, (h, w), split_indices)
+def embed_text_into_image(cover_path: str, enc_file: str, key: str, bits_per_pixel: int = 1,
+                          engine: str = engines.DEFAULT_ENGINE):
+    img = image_ops.load_image_cached(cover_path)
 
     # Read encrypted payload
     with open(enc_file, "rb") as f:
         cipher = f.read()
 
-    # Header + cipher
-    header = len(cipher).to_bytes(4, "big")
-    payload = header + cipher
-
-    # Embed into shuffled blue using key-based pixel permutation
-    stego_shuffled_blue = utils.embed_payload_in_channel(
-        shuffled_blue, payload, bits_per_pixel=bits_per_pixel
-    )
-
-    # Unshuffle back to visual
-    stego_blue = utils.unshuffle_to_visual_with_indices(stego_shuffled_blue, perm, split_indices)
-
-    stego_proc = image_ops.merge_rgb(r, g, stego_blue)
-    stego = image_ops.inv_flip_transpose(stego_proc)
+    stego = pipeline.embed_array(img, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine)
 
     out_path = OUTPUT_DIR / "stego.png"
     image_ops.save_image(stego, str(out_path))
@@ -73,29 +53,11 @@ def embed_text_into_image(cover_path: str, enc_file: str, key: str, bits_per_pix
     return out_path
 
 def extract_text_from_image(
-    stego_path: str, key: str, bits_per_pixel: int = 1, out_file: str = "output/extracted.bin"
+    stego_path: str, key: str, bits_per_pixel: int = 1, out_file: str = "output/extracted.bin",
+    engine: str = engines.DEFAULT_ENGINE
 ):
     img = image_ops.load_image(stego_path)
-    proc = image_ops.flip_transpose(img)
-    r, g, b = image_ops.split_rgb(proc)
-    h, w = b.shape
-
-    # Shuffle blue as embedding did
-    perm = utils.generate_perm_from_key(key)
-    shuffled_blue, split_indices = utils.make_shuffled_blue(b, perm)
-
-    # Header (cipher length: 32 bits)
-    header_bytes = utils.extract_bits_from_channel(
-        shuffled_blue, 32, bits_per_pixel=bits_per_pixel
-    )  # Removed key argument
-    cipher_len = int.from_bytes(header_bytes, "big")
-
-    # Cipher
-    total_bits = (cipher_len * 8) + 32
-    combined = utils.extract_bits_from_channel(
-        shuffled_blue, total_bits, bits_per_pixel=bits_per_pixel
-    )  # Removed key argument
-    cipher_bytes = combined[4:4 + cipher_len]
+    cipher_bytes = pipeline.extract_array(img, key, bits_per_pixel=bits_per_pixel, engine=engine)
 
     Path(out_file).parent.mkdir(parents=True, exist_ok=True)
     with open(out_file, "wb") as f:
@@ -131,9 +93,112 @@ def run_metrics():
     save_csv(results, "results/metrics_single_pair.csv")
     print("[+] Metrics saved to results/metrics_single_pair.csv")
 
+# ---------- Pipe-friendly CLI ----------
+
+def run_cli(argv):
+    """
+    hide:          python main.py hide --key K [--cover input/cover.png] < secret.txt > stego.png
+    reveal:        python main.py reveal --key K < stego.png > secret.txt
+    hide-frames:   python main.py hide-frames --key K --frames frames_dir/ --output stego.tif < big.bin
+    reveal-frames: python main.py reveal-frames --key K --frames stego.tif > big.bin
+    update:        python main.py update --key K --stego stego.png < new_secret.txt
+    Nothing is written under output/, so concurrent invocations never collide.
+    Bad input (wrong key, payload too large, unknown extension, missing file, ...)
+    prints one line to stderr and exits with status 1.
+    """
+    ap = argparse.ArgumentParser(description="Hide / reveal through stdin and stdout ('-')")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("hide", "reveal", "hide-frames", "reveal-frames", "update"):
+        p = sub.add_parser(name)
+        p.add_argument("--key", required=True)
+        p.add_argument("--bpp", type=int, default=1, choices=[1, 2, 3, 4])
+        p.add_argument("--engine", default=engines.DEFAULT_ENGINE, choices=list(engines.ENGINES))
+        p.add_argument("--workers", type=int, default=1, help="threads for embed/extract shards (or frames)")
+        if name.startswith("reveal"):
+            p.add_argument("--keystream", default=None, choices=list(encryption.KEYSTREAMS),
+                           help="default: the one recorded in the header ('repeat' for untagged images)")
+        else:
+            p.add_argument("--keystream", default=encryption.DEFAULT_KEYSTREAM, choices=list(encryption.KEYSTREAMS),
+                           help="encryption keystream, recorded in the header; 'repeat' writes the "
+                                "original untagged format")
+        if name in ("hide", "reveal"):
+            p.add_argument("--mode", default=pipeline.DEFAULT_MODE, choices=list(pipeline.MODES))
+            p.add_argument("--input", default="-", help="message (hide) or stego image (reveal); '-' = stdin")
+        elif name == "update":
+            p.add_argument("--stego", required=True, help="stego image rewritten in place (.npy is patched on disk)")
+            p.add_argument("--input", default="-", help="new message; '-' = stdin")
+            p.add_argument("--scrub-tail", action="store_true",
+                           help="overwrite what a longer old message leaves past the new one")
+            continue
+        else:
+            p.add_argument("--frames", required=True, help="frame directory, multi-page TIFF or APNG")
+            if name == "hide-frames":
+                p.add_argument("--input", default="-", help="message; '-' = stdin")
+        if name == "hide-frames":
+            p.add_argument("--output", required=True, help="frame directory, .tif/.tiff or .png/.apng")
+        else:
+            p.add_argument("--output", default="-", help="'-' = stdout")
+        if name in ("hide", "hide-frames"):
+            p.add_argument("--codec", default="png", choices=list(codecs.CODECS))
+        if name == "hide":
+            p.add_argument("--cover", default="input/cover.png")
+            p.add_argument("--low-memory", action="store_true", help="embed into one working buffer in place")
+            p.add_argument("--verify", action="store_true", help="check the payload in memory after embedding")
+    args = ap.parse_args(argv)
+    try:
+        _run_command(args)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"[!] {args.cmd}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def _run_command(args):
+    data = None
+    if getattr(args, "input", None) == "-":
+        data = sys.stdin.buffer.read()
+    elif getattr(args, "input", None):
+        with open(args.input, "rb") as f:
+            data = f.read()
+
+    if args.cmd == "hide":
+        out = pipeline.hide(args.cover, data, args.key, bits_per_pixel=args.bpp,
+                            engine=args.engine, codec=args.codec, mode=args.mode,
+                            low_memory=args.low_memory, workers=args.workers,
+                            verify=args.verify, keystream=args.keystream)
+    elif args.cmd == "reveal":
+        out = pipeline.reveal(data, args.key, bits_per_pixel=args.bpp, engine=args.engine, mode=args.mode,
+                              workers=args.workers, keystream=args.keystream)
+    elif args.cmd == "hide-frames":
+        n = frames.hide_frames(args.frames, data, args.key, args.output, bits_per_pixel=args.bpp,
+                               engine=args.engine, workers=args.workers, codec=args.codec,
+                               keystream=args.keystream)
+        print(f"[+] Wrote {n} frames to {args.output}", file=sys.stderr)
+        return
+    elif args.cmd == "update":
+        stats = pipeline.update_file(args.stego, data, args.key, bits_per_pixel=args.bpp, engine=args.engine,
+                                     keystream=args.keystream, scrub_tail=args.scrub_tail)
+        print(f"[+] Rewrote {stats['changed_slots']} of {stats['payload_slots']} payload pixels "
+              f"({stats['changed_bits']} bits) in {args.stego}", file=sys.stderr)
+        if stats["stale_tail_slots"]:
+            print(f"[!] {stats['stale_tail_slots']} pixels past the new payload still hold the old one "
+                  "(use --scrub-tail)", file=sys.stderr)
+        return
+    else:
+        out = frames.reveal_frames(args.frames, args.key, bits_per_pixel=args.bpp, engine=args.engine,
+                                   workers=args.workers, keystream=args.keystream)
+
+    if args.output == "-":
+        sys.stdout.buffer.write(out)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as f:
+            f.write(out)
+
 # ---------- Interactive Menu ----------
 
 def main():
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+        return
     while True:
         print("\n===== Image Steganography Menu =====")
         print("1. Encrypt text")
@@ -158,14 +223,16 @@ def main():
             key = input("Secret key / password: ").strip()
             bpp_in = input("Bits per pixel (1-4) [1]: ").strip() or "1"
             bpp = int(bpp_in)
-            embed_text_into_image(cover, enc_file, key, bpp)
+            engine = input(f"Engine ({'/'.join(engines.ENGINES)}) [{engines.DEFAULT_ENGINE}]: ").strip() or engines.DEFAULT_ENGINE
+            embed_text_into_image(cover, enc_file, key, bpp, engine=engine)
 
         elif choice == "3":
             stego = input("Stego image path [output/stego.png]: ").strip() or "output/stego.png"
             key = input("Secret key / password: ").strip()
             bpp_in = input("Bits per pixel (1-4) [1]: ").strip() or "1"
             bpp = int(bpp_in)
-            extract_text_from_image(stego, key, bpp)
+            engine = input(f"Engine ({'/'.join(engines.ENGINES)}) [{engines.DEFAULT_ENGINE}]: ").strip() or engines.DEFAULT_ENGINE
+            extract_text_from_image(stego, key, bpp, engine=engine)
 
         elif choice == "4":
             enc_file = input("Encrypted file path [output/extracted.bin]: ").strip() or "output/extracted.bin"
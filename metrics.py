@@ -2,11 +2,14 @@ import os, math, csv, argparse, warnings
 from typing import Dict, List
 import numpy as np, cv2
 from skimage.metrics import structural_similarity as ssim
-from steg_utils import image_ops, utils
+from steg_utils import image_ops, pipeline
 warnings.filterwarnings("ignore")
 
 # ---- metrics ----
+# x may also be a CoverStats, which reuses the cached cover-side terms
 def mse(x: np.ndarray, y: np.ndarray) -> float:
+    if isinstance(x, CoverStats):
+        return x.mse(y)
     d = x.astype(np.float64) - y.astype(np.float64)
     return float(np.mean(d ** 2))
 def rmse(x: np.ndarray, y: np.ndarray) -> float:
@@ -15,13 +18,116 @@ def psnr(x: np.ndarray, y: np.ndarray, max_val: float = 255.0) -> float:
     m = mse(x, y)
     return float("inf") if m == 0.0 else 20.0 * math.log10(max_val / math.sqrt(m))
 def ncc(x: np.ndarray, y: np.ndarray) -> float:
+    if isinstance(x, CoverStats):
+        return x.ncc(y)
     xv = x.astype(np.float64).ravel(); yv = y.astype(np.float64).ravel()
     xv -= xv.mean(); yv -= yv.mean()
     denom = np.linalg.norm(xv) * np.linalg.norm(yv)
     return float((xv @ yv) / denom) if denom != 0.0 else 0.0
 def ssim_index(x: np.ndarray, y: np.ndarray) -> float:
+    if isinstance(x, CoverStats):
+        return x.ssim(y)
     return float(ssim(x, y, channel_axis=-1, data_range=255))
 
+# ---- cover-side cache ----
+# SSIM with skimage's defaults: 7x7 uniform window, sample covariance,
+# data_range 255, border of (win-1)//2 cropped, mean over channels. Only
+# full windows survive the crop, so a separable box sum reproduces it exactly.
+SSIM_WIN = 7
+SSIM_C1, SSIM_C2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+_COV_NORM = SSIM_WIN ** 2 / (SSIM_WIN ** 2 - 1)
+
+def _box_mean(a: np.ndarray, win: int = SSIM_WIN) -> np.ndarray:
+    """Mean over every full win x win window of a (N, H, W, C) float array, via an integral image."""
+    n, h, w = a.shape[:3]
+    p = np.zeros((n, h + 1, w + 1) + a.shape[3:])
+    np.cumsum(a, axis=1, out=p[:, 1:, 1:])
+    np.cumsum(p[:, 1:, 1:], axis=2, out=p[:, 1:, 1:])
+    out = p[:, win:, win:] - p[:, :-win, win:]
+    out -= p[:, win:, :-win]
+    out += p[:, :-win, :-win]
+    out *= 1.0 / (win * win)
+    return out
+
+def _as_hwc(arr: np.ndarray) -> np.ndarray:
+    return arr.reshape(arr.shape[0], arr.shape[1], -1)
+
+class CoverStats:
+    """
+    Cover-side terms of mse / ncc / ssim_index (float copy, centred vector and
+    norm, SSIM local means and variances), computed once. Scoring a stego then
+    only needs its own terms and the cross terms; score_batch scores N stegos
+    against the cover batch_size at a time in one vectorized pass per batch.
+    """
+    def __init__(self, cover: np.ndarray):
+        x = _as_hwc(cover).astype(np.float64)
+        if min(x.shape[:2]) < SSIM_WIN:
+            raise ValueError(f"Cover must be at least {SSIM_WIN}x{SSIM_WIN} for SSIM.")
+        self.shape = cover.shape
+        self.x = x
+        self.xc = x.ravel() - x.mean()
+        self.x_norm = float(np.linalg.norm(self.xc))
+        self.ux = _box_mean(x[None])[0]
+        self.ux2_c1 = self.ux * self.ux + SSIM_C1
+        self.vx_c2 = _COV_NORM * (_box_mean((x * x)[None])[0] - self.ux * self.ux) + SSIM_C2
+
+    def _stack(self, stegos) -> np.ndarray:
+        if any(s.shape != self.shape for s in stegos):
+            raise ValueError(f"Stego images must match the cover shape {self.shape}.")
+        return np.stack([_as_hwc(s) for s in stegos]).astype(np.float64)
+
+    def _mse(self, y: np.ndarray) -> np.ndarray:
+        d = (y - self.x).reshape(len(y), -1)
+        return np.einsum("ij,ij->i", d, d) / d.shape[1]
+
+    def _ncc(self, y: np.ndarray) -> np.ndarray:
+        yc = y.reshape(len(y), -1)
+        yc = yc - yc.mean(axis=1, keepdims=True)
+        denom = self.x_norm * np.linalg.norm(yc, axis=1)
+        num = yc @ self.xc
+        return np.divide(num, denom, out=np.zeros_like(num), where=denom != 0.0)
+
+    def _ssim(self, y: np.ndarray) -> np.ndarray:
+        uy = _box_mean(y)
+        ux_uy = self.ux * uy
+        uy2 = uy * uy
+        vy = _box_mean(y * y)
+        vy -= uy2
+        vy *= _COV_NORM
+        vxy = _box_mean(y * self.x)
+        vxy -= ux_uy
+        # numerator (2 ux uy + C1)(2 vxy + C2), denominator (ux^2 + uy^2 + C1)(vx + vy + C2)
+        num = np.multiply(ux_uy, 2.0, out=ux_uy)
+        num += SSIM_C1
+        vxy *= 2.0 * _COV_NORM
+        vxy += SSIM_C2
+        num *= vxy
+        den = np.add(uy2, self.ux2_c1, out=uy2)
+        vy += self.vx_c2
+        den *= vy
+        num /= den
+        return num.reshape(len(y), -1).mean(axis=1)
+
+    def mse(self, stego: np.ndarray) -> float:
+        return float(self._mse(self._stack([stego]))[0])
+    def ncc(self, stego: np.ndarray) -> float:
+        return float(self._ncc(self._stack([stego]))[0])
+    def ssim(self, stego: np.ndarray) -> float:
+        return float(self._ssim(self._stack([stego]))[0])
+
+    def score_batch(self, stegos, batch_size: int = 8) -> Dict[str, np.ndarray]:
+        """MSE / RMSE / PSNR / NCC / SSIM arrays for a sequence of stego images."""
+        stegos = list(stegos)
+        cols = {"MSE": [], "NCC": [], "SSIM": []}
+        for i in range(0, len(stegos), max(1, batch_size)):
+            y = self._stack(stegos[i:i + batch_size])
+            cols["MSE"].append(self._mse(y)); cols["NCC"].append(self._ncc(y)); cols["SSIM"].append(self._ssim(y))
+        out = {k: np.concatenate(v) if v else np.empty(0) for k, v in cols.items()}
+        with np.errstate(divide="ignore"):
+            psnrs = 20.0 * np.log10(255.0 / np.sqrt(out["MSE"]))
+        return {"MSE": out["MSE"], "RMSE": np.sqrt(out["MSE"]), "PSNR": psnrs,
+                "NCC": out["NCC"], "SSIM": out["SSIM"]}
+
 # ---- helpers ----
 def _resize_rgb(arr: np.ndarray, side: int) -> np.ndarray:
     return cv2.resize(arr, (side, side), interpolation=cv2.INTER_AREA)
@@ -29,17 +135,7 @@ def _fit_payload(payload: bytes, capacity_bits: int, header_bits: int = 32) -> b
     max_bytes = max((capacity_bits - header_bits) // 8, 0)
     return payload[:max_bytes]
 def _embed_rgb(cover_rgb: np.ndarray, payload: bytes, key: str, bpp: int) -> np.ndarray:
-    proc = image_ops.flip_transpose(cover_rgb)
-    r, g, b = image_ops.split_rgb(proc)
-    blocks, split_idx = image_ops.split_blue_blocks(b)
-    perm = utils.generate_perm_from_key(key)
-    shuffled = [blocks[p] for p in perm]
-    shuffled_blue = image_ops.combine_blue_blocks(shuffled, b.shape, split_idx)
-    header = len(payload).to_bytes(4, "big")
-    stego_shuf = utils.embed_payload_in_channel(shuffled_blue, header + payload, bits_per_pixel=bpp)
-    stego_blue = utils.unshuffle_to_visual_with_indices(stego_shuf, perm, split_idx)
-    stego_proc = image_ops.merge_rgb(r, g, stego_blue)
-    return image_ops.inv_flip_transpose(stego_proc)
+    return pipeline.embed_array(cover_rgb, payload, key, bits_per_pixel=bpp)
 def _load_payload(enc_file: str) -> bytes:
     with open(enc_file, "rb") as f:
         return f.read()
@@ -47,7 +143,7 @@ def _load_payload(enc_file: str) -> bytes:
 # ---- evaluation ----
 def evaluate_per_size(cover_path: str, payload: bytes, key: str, bpp: int, side: int,
                       out_dir: str = "output") -> Dict[str, float]:
-    cover_rgb = image_ops.load_image(cover_path)   # RGB
+    cover_rgb = image_ops.load_image_cached(cover_path)   # RGB, decoded once per cover
     cover_resized = _resize_rgb(cover_rgb, side)
     stego = _embed_rgb(cover_resized, payload, key, bpp)
     os.makedirs(out_dir, exist_ok=True)
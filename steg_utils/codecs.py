@@ -0,0 +1,147 @@
+import io
+import os
+import struct
+import zlib
+import numpy as np
+from PIL import Image
+
+# ------------------------------
+# Output codecs for stego images
+# ------------------------------
+# Every codec is lossless, so the embedded LSBs survive the round trip.
+#   - "png":      Pillow PNG (compress_level 0-9, optimize)
+#   - "png-fast": numpy + zlib PNG writer with an explicit scanline filter
+#   - "png-cv2":  OpenCV PNG encoder (optional dependency)
+#   - "webp":     Pillow lossless WebP (method 0-6 trades speed for size)
+#   - "npy":      raw NumPy array, for intermediate pipelines
+
+NPY_MAGIC = b"\x93NUMPY"
+PNG_FILTERS = {"none": 0, "sub": 1, "up": 2, "avg": 3, "paeth": 4}
+_PNG_COLOR_TYPES = {1: 0, 3: 2, 4: 6}       # channels -> PNG colour type
+_EXT_CODECS = {".png": "png", ".webp": "webp", ".npy": "npy"}
+
+
+def _as_uint8(arr: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(arr.astype("uint8", copy=False))
+
+
+def _encode_pil_png(arr, buf, compress_level: int = 6, optimize: bool = False):
+    Image.fromarray(_as_uint8(arr)).save(buf, format="PNG", compress_level=compress_level, optimize=optimize)
+
+
+def _encode_webp(arr, buf, method: int = 4, quality: int = 100):
+    # quality is the compression effort when lossless=True
+    Image.fromarray(_as_uint8(arr)).save(buf, format="WEBP", lossless=True, method=method, quality=quality)
+
+
+def _encode_npy(arr, buf):
+    np.save(buf, _as_uint8(arr), allow_pickle=False)
+
+
+def _encode_cv2_png(arr, buf, compress_level: int = 1):
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("codec 'png-cv2' needs opencv-python (cv2) installed.") from None
+    arr = _as_uint8(arr)
+    if arr.ndim == 3 and arr.shape[2] == 3:
+        arr = arr[:, :, ::-1]                  # cv2 expects BGR
+    ok, enc = cv2.imencode(".png", arr, [cv2.IMWRITE_PNG_COMPRESSION, int(compress_level)])
+    if not ok:
+        raise RuntimeError("cv2.imencode failed to encode PNG.")
+    buf.write(enc.tobytes())
+
+
+def _filter_scanlines(raw: np.ndarray, bpp: int, filter_type: int) -> np.ndarray:
+    """
+    Apply one PNG filter to every scanline of raw (h, row_bytes) at once.
+    All predictors use unfiltered neighbours, so each filter is one vectorized pass.
+    """
+    if filter_type == 0:
+        return raw
+    a = np.zeros_like(raw)                     # left
+    a[:, bpp:] = raw[:, :-bpp]
+    b = np.zeros_like(raw)                     # up
+    b[1:] = raw[:-1]
+    if filter_type == 1:
+        return raw - a
+    if filter_type == 2:
+        return raw - b
+    if filter_type == 3:
+        return raw - ((a.astype(np.uint16) + b) >> 1).astype(np.uint8)
+    c = np.zeros_like(raw)                     # up-left
+    c[1:, bpp:] = raw[:-1, :-bpp]
+    ai, bi, ci = a.astype(np.int16), b.astype(np.int16), c.astype(np.int16)
+    p = ai + bi - ci
+    pa, pb, pc = np.abs(p - ai), np.abs(p - bi), np.abs(p - ci)
+    pred = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    return raw - pred
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def _encode_fast_png(arr, buf, compress_level: int = 1, png_filter: str = "none"):
+    if png_filter not in PNG_FILTERS:
+        raise ValueError(f"Unknown PNG filter {png_filter!r}, choose from {list(PNG_FILTERS)}.")
+    arr = _as_uint8(arr)
+    h, w = arr.shape[:2]
+    channels = 1 if arr.ndim == 2 else arr.shape[2]
+    if channels not in _PNG_COLOR_TYPES:
+        raise ValueError(f"Unsupported channel count {channels} for PNG.")
+
+    ftype = PNG_FILTERS[png_filter]
+    raw = arr.reshape(h, w * channels)
+    lines = np.empty((h, w * channels + 1), dtype=np.uint8)
+    lines[:, 0] = ftype
+    lines[:, 1:] = _filter_scanlines(raw, channels, ftype)
+
+    ihdr = struct.pack(">IIBBBBB", w, h, 8, _PNG_COLOR_TYPES[channels], 0, 0, 0)
+    buf.write(b"\x89PNG\r\n\x1a\n")
+    buf.write(_png_chunk(b"IHDR", ihdr))
+    buf.write(_png_chunk(b"IDAT", zlib.compress(lines.tobytes(), compress_level)))
+    buf.write(_png_chunk(b"IEND", b""))
+
+
+CODECS = {
+    "png": _encode_pil_png,
+    "png-fast": _encode_fast_png,
+    "png-cv2": _encode_cv2_png,
+    "webp": _encode_webp,
+    "npy": _encode_npy,
+}
+
+
+def codec_for_path(path: str) -> str:
+    """Codec for a file extension; ValueError for extensions no lossless codec here writes."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return _EXT_CODECS[ext]
+    except KeyError:
+        raise ValueError(f"No codec for {ext or 'files without an extension'!r} ({path}); "
+                         f"use one of {list(_EXT_CODECS)} or pass codec=.") from None
+
+
+def write_image(arr: np.ndarray, buf, codec: str = "png", **options):
+    """Encode arr into a writable binary file object with the named codec."""
+    try:
+        encoder = CODECS[codec]
+    except KeyError:
+        raise ValueError(f"Unknown codec {codec!r}, choose from {list(CODECS)}.") from None
+    encoder(arr, buf, **options)
+
+
+def encode_image(arr: np.ndarray, codec: str = "png", **options) -> bytes:
+    """Encode arr to an in-memory buffer and return the bytes."""
+    buf = io.BytesIO()
+    write_image(arr, buf, codec, **options)
+    return buf.getvalue()
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode bytes from any codec above back to a uint8 RGB (or raw .npy) array."""
+    if data[:len(NPY_MAGIC)] == NPY_MAGIC:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    return np.array(img, dtype=np.uint8)
@@ -1,35 +1,184 @@
 import hashlib
+import struct
+from operator import itemgetter, methodcaller
+import numpy as np
 
-def _key_stream(key: str, length: int) -> bytes:
-    """Deterministic keystream derived from SHA-256 of key (repeated)."""
+# ------------------------------
+# Keystreams
+# ------------------------------
+# "repeat" is the original keystream (SHA-256 of the key, repeated). The counter
+# modes hash (derived key, block counter) per block, so the stream never
+# repeats and any offset can be generated on its own (streaming, parallel chunks).
+#   - "shake256-ctr-v1": the bulk mode and the default for new embeds. SHAKE-256
+#     squeezes 64 KiB per counter value in one C call (~150-300 MB/s).
+#   - "sha256-ctr-v1" / "blake2b-ctr-v1": one 32/64-byte digest per counter
+#     value. Counters are hashed in batches through C-level iterators (no Python
+#     code per digest), but one hashlib call per digest still caps them at
+#     roughly 30 / 80 MB/s; use them for message-sized payloads.
+# The -v1 suffix pins the derivation; a changed derivation gets a new name.
+#
+# The mode is recorded in the stego header (see KEYSTREAM_IDS and
+# pipeline.pack_header); images without a tag predate it and use "repeat".
+# There is still no integrity check: a wrong key decrypts to garbage.
+KEYSTREAM_DOMAIN = b"steg_utils keystream v1"
+SHAKE_BLOCK = 1 << 16
+CTR_BATCH = 1 << 10             # digest-mode counters hashed per batch
+DEFAULT_KEYSTREAM = "shake256-ctr-v1"
+LEGACY_KEYSTREAM = "repeat"
+
+_digest = methodcaller("digest")
+
+
+def _repeat_blocks(key: str):
     kb = hashlib.sha256(key.encode()).digest()
-    reps = (length + len(kb) - 1) // len(kb)
-    return (kb * reps)[:length]
+    return len(kb), lambda first, count: bytearray(kb) * count
+
+
+def _ctr_blocks(new_hash, size: int = None):
+    def blocks(key: str):
+        prefix = KEYSTREAM_DOMAIN + key.encode()
+        if size:                                 # XOF: one large block per counter value
+            base = new_hash(prefix)
+
+            def fill(first, count):
+                buf = bytearray(count * size)
+                for i in range(count):
+                    h = base.copy()
+                    h.update((first + i).to_bytes(8, "big"))
+                    buf[i * size:(i + 1) * size] = h.digest(size)
+                return buf
+            return size, fill
+
+        width = len(prefix) + 8
+        unpack = struct.Struct(f"{width}s").iter_unpack
+
+        def fill(first, count):
+            # hash(prefix || counter) for a batch of counters, iterated in C
+            buf = bytearray()
+            for lo in range(first, first + count, CTR_BATCH):
+                n = min(CTR_BATCH, first + count - lo)
+                msgs = np.empty((n, width), dtype=np.uint8)
+                msgs[:, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+                msgs[:, len(prefix):] = np.arange(lo, lo + n, dtype=">u8").view(np.uint8).reshape(n, 8)
+                buf += b"".join(map(_digest, map(new_hash, map(itemgetter(0), unpack(msgs.tobytes())))))
+            return buf
+        return new_hash().digest_size, fill
+    return blocks
+
+
+# name -> (key -> (block size, fill(first_block, count) -> bytearray))
+KEYSTREAMS = {
+    "repeat": _repeat_blocks,
+    "sha256-ctr-v1": _ctr_blocks(hashlib.sha256),
+    "blake2b-ctr-v1": _ctr_blocks(hashlib.blake2b),
+    "shake256-ctr-v1": _ctr_blocks(hashlib.shake_256, SHAKE_BLOCK),
+}
+
+# Header tag of each mode (pipeline.pack_header); 0 is never written, untagged means "repeat"
+KEYSTREAM_IDS = {"repeat": 0, "sha256-ctr-v1": 1, "blake2b-ctr-v1": 2, "shake256-ctr-v1": 3}
+
+
+def check_keystream(mode: str) -> str:
+    if mode not in KEYSTREAMS:
+        raise ValueError(f"Unknown keystream {mode!r}, choose from {list(KEYSTREAMS)}.")
+    return mode
+
+
+def _key_stream(key: str, length: int, mode: str = DEFAULT_KEYSTREAM, offset: int = 0) -> bytearray:
+    """
+    `length` keystream bytes starting at byte `offset`. Every mode is seekable:
+    _key_stream(k, n, m, o) == _key_stream(k, o + n, m)[o:].
+    """
+    blocks = KEYSTREAMS[check_keystream(mode)]
+    if length <= 0:
+        return bytearray()
+    size, fill = blocks(key)
+    first, skip = divmod(offset, size)
+    buf = fill(first, (skip + length + size - 1) // size)
+    del buf[skip + length:]                   # trim in place, no second copy
+    del buf[:skip]
+    return buf
+
+
+# ------------------------------
+# MLEA-like byte transform
+# ------------------------------
+# The nibble transform is applied to 8 bytes at a time in uint64 lanes (byte-wise
+# masks keep the shifts inside each byte), chunk by chunk so temporaries stay small.
+MLE_CHUNK_LANES = 1 << 14       # 128 KiB per pass (stays in cache)
+
+
+def _lane_mask(byte: int) -> np.uint64:
+    return np.uint64(byte * 0x0101010101010101)
+
+
+_U1, _U4, _U7 = np.uint64(1), np.uint64(4), np.uint64(7)
+_LOW1, _LOW4, _LOW7 = _lane_mask(0x01), _lane_mask(0x0F), _lane_mask(0x7F)
+_HIGH1, _HIGH4, _HIGH7 = _lane_mask(0x80), _lane_mask(0xF0), _lane_mask(0xFE)
+
 
-def mle_encrypt(plain: bytes, key: str) -> bytes:
+def _mle_forward(w: np.ndarray):
+    """In place on uint64 lanes: rotate each byte left by 1, then (B2 ^ B1) << 4 | B1."""
+    s = w << _U1
+    s &= _HIGH7
+    t = w >> _U7
+    t &= _LOW1
+    s |= t                                   # b_shift = B1 << 4 | B2
+    np.right_shift(s, _U4, out=t)
+    t &= _LOW4                               # B1
+    np.left_shift(s, _U4, out=w)
+    w &= _HIGH4                              # B2 << 4
+    s &= _HIGH4                              # B1 << 4
+    w ^= s
+    w |= t
+
+
+def _mle_inverse(w: np.ndarray):
+    """In place on uint64 lanes: undo _mle_forward."""
+    b1 = w & _LOW4
+    s = w >> _U4
+    s &= _LOW4
+    s ^= b1                                  # B2
+    b1 <<= _U4
+    s |= b1                                  # b_shift = B1 << 4 | B2
+    np.right_shift(s, _U1, out=w)
+    w &= _LOW7
+    s <<= _U7
+    s &= _HIGH1
+    w |= s                                   # right circular shift by 1
+
+
+def _mle_apply(data, transform, stream: bytearray, stream_first: bool = False) -> bytes:
+    """transform(data) XOR stream, or transform(data XOR stream) with stream_first."""
+    n = len(data)
+    buf = np.zeros(-(-n // 8) * 8, dtype=np.uint8)
+    buf[:n] = np.frombuffer(data, dtype=np.uint8)
+    ks = np.frombuffer(stream, dtype=np.uint8)
+    step = MLE_CHUNK_LANES * 8
+    for lo in range(0, buf.size, step):
+        chunk, key_part = buf[lo:lo + step], ks[lo:lo + step]
+        if stream_first:
+            chunk[:key_part.size] ^= key_part
+        transform(chunk.view(np.uint64))
+        if not stream_first:
+            chunk[:key_part.size] ^= key_part
+    return buf[:n].tobytes()
+
+
+def mle_encrypt(plain: bytes, key: str, keystream: str = DEFAULT_KEYSTREAM, offset: int = 0) -> bytes:
     """
     MLEA-like transform (keystream XOR on top):
     - left circular shift by 1
     - split to two nibbles B1 (upper), B2 (lower)
     - B2 = B2 XOR B1
     - combined = (B2 << 4) | B1
-    - XOR with keystream derived from key
+    - XOR with keystream derived from key (starting at byte `offset`)
     Returns bytes (cipher).
     """
-    out = bytearray()
-    for b in plain:
-        # left circular shift by 1
-        b_shift = ((b << 1) & 0xFF) | ((b >> 7) & 0x01)
-        B1 = (b_shift >> 4) & 0x0F  # upper nibble
-        B2 = b_shift & 0x0F         # lower nibble
-        B2 = B2 ^ B1
-        combined = ((B2 & 0x0F) << 4) | (B1 & 0x0F)
-        out.append(combined & 0xFF)
-    ks = _key_stream(key, len(out))
-    cipher = bytes([o ^ ks[i] for i, o in enumerate(out)])
-    return cipher
-
-def mle_decrypt(cipher: bytes, key: str) -> bytes:
+    return _mle_apply(plain, _mle_forward, _key_stream(key, len(plain), keystream, offset))
+
+
+def mle_decrypt(cipher: bytes, key: str, keystream: str = DEFAULT_KEYSTREAM, offset: int = 0) -> bytes:
     """
     Reverse of mle_encrypt:
     - XOR keystream
@@ -38,15 +187,4 @@ def mle_decrypt(cipher: bytes, key: str) -> bytes:
     - b_shift = (B1<<4) | B2_orig
     - right circular shift by 1 to get original byte
     """
-    ks = _key_stream(key, len(cipher))
-    interm = bytes([c ^ ks[i] for i, c in enumerate(cipher)])
-    out = bytearray()
-    for cb in interm:
-        B2_enc = (cb >> 4) & 0x0F
-        B1 = cb & 0x0F
-        B2_orig = B2_enc ^ B1
-        b_shift = ((B1 & 0x0F) << 4) | (B2_orig & 0x0F)
-        # right circular shift by 1
-        b_orig = ((b_shift >> 1) | ((b_shift & 0x01) << 7)) & 0xFF
-        out.append(b_orig)
-    return bytes(out)
+    return _mle_apply(cipher, _mle_inverse, _key_stream(key, len(cipher), keystream, offset), stream_first=True)
@@ -0,0 +1,116 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .magic_lsb import write_bits_to_slots, read_bits_from_slots
+from .image_ops import block_raster_indices
+from .utils import generate_magic_indices, index_cached
+
+# ------------------------------
+# Embedding engine registry
+# ------------------------------
+# An engine is a visiting order over the (shuffled) blue channel plus the bit
+# order inside each pixel. Both engines share the slot kernel in magic_lsb.
+#   - "magic":  magic-square visiting order, LSB-first bits (utils.embed_payload_in_channel)
+#   - "blocks": BC1->BC2->BC3->BC4 raster order, MSB-first chunks (magic_lsb.embed_bits_in_blocks)
+Engine = namedtuple("Engine", ["name", "slot_order", "bitorder"])
+
+
+def _magic_slots(shape: tuple) -> np.ndarray:
+    return generate_magic_indices(int(np.prod(shape)))
+
+
+@index_cached
+def _block_slots(shape: tuple) -> np.ndarray:
+    h, w = shape
+    return block_raster_indices((h, w), np.int32 if h * w < 2 ** 31 else np.int64)
+
+
+# slot_order(shape) results are cached (utils index cache, bounded by bytes) and read-only
+ENGINES = {
+    "magic": Engine("magic", _magic_slots, "little"),
+    "blocks": Engine("blocks", _block_slots, "big"),
+}
+DEFAULT_ENGINE = "magic"
+
+
+MIN_SHARD_SLOTS = 1 << 16   # below this a shard is not worth a thread
+
+
+def shard_bounds(n_slots: int, workers: int, align: int = 8) -> list:
+    """
+    Split [0, n_slots) into at most `workers` contiguous (start, stop) shards.
+    Starts are multiples of `align` slots so every shard begins on a payload byte.
+    """
+    shards = max(1, min(int(workers), n_slots // MIN_SHARD_SLOTS))
+    step = -(-n_slots // shards)
+    step = max(-(-step // align) * align, align)
+    return [(start, min(start + step, n_slots)) for start in range(0, n_slots, step)] or [(0, 0)]
+
+
+def run_sharded(fn, n_slots: int, workers: int = 1, align: int = 8):
+    """
+    Call fn(start, stop) for each shard of the visiting order, on a thread pool
+    when workers > 1. Shards touch disjoint slots (the order is a permutation),
+    and the NumPy gather/scatter in the slot kernel releases the GIL, so the
+    result is bit-identical to a single-threaded run.
+    """
+    bounds = shard_bounds(n_slots, workers, align)
+    if len(bounds) == 1:
+        fn(*bounds[0])
+        return
+    with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+        for f in [pool.submit(fn, start, stop) for start, stop in bounds]:
+            f.result()
+
+
+def get_engine(name: str) -> Engine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine {name!r}, choose from {sorted(ENGINES)}.") from None
+
+
+def embed_payload(channel: np.ndarray, payload: bytes, bits_per_pixel: int = 2,
+                  engine: str = DEFAULT_ENGINE, workers: int = 1) -> np.ndarray:
+    """Embed payload bytes into a 2D uint8 channel with the named engine (sharded over `workers` threads)."""
+    if bits_per_pixel < 1 or bits_per_pixel > 4:
+        raise ValueError("bits_per_pixel must be between 1 and 4.")
+    eng = get_engine(engine)
+
+    flat = channel.flatten().astype(np.uint8)
+    total_bits = len(payload) * 8
+    capacity_bits = flat.size * bits_per_pixel
+    if total_bits > capacity_bits:
+        raise ValueError(f"Payload too large: need {total_bits} bits, have {capacity_bits} bits.")
+
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+    slots = eng.slot_order(channel.shape)
+
+    def work(start, stop):
+        write_bits_to_slots(flat, bits[start * bits_per_pixel:stop * bits_per_pixel], bits_per_pixel,
+                            slots=slots[start:stop], bitorder=eng.bitorder)
+
+    run_sharded(work, -(-total_bits // bits_per_pixel), workers)
+    return flat.reshape(channel.shape)
+
+
+def extract_payload_bits(channel: np.ndarray, num_bits: int, bits_per_pixel: int = 2,
+                         engine: str = DEFAULT_ENGINE, workers: int = 1) -> bytes:
+    """Read num_bits from a channel with the named engine, packed MSB-first into bytes."""
+    if bits_per_pixel < 1 or bits_per_pixel > 4:
+        raise ValueError("bits_per_pixel must be between 1 and 4.")
+    eng = get_engine(engine)
+
+    flat = channel.reshape(-1).astype(np.uint8, copy=False)
+    slots = eng.slot_order(channel.shape)
+    if num_bits > slots.size * bits_per_pixel:
+        raise ValueError(f"Requested {num_bits} bits but capacity is {slots.size * bits_per_pixel}")
+    bits = np.empty(num_bits, dtype=np.uint8)
+
+    def work(start, stop):
+        lo, hi = start * bits_per_pixel, min(stop * bits_per_pixel, num_bits)
+        bits[lo:hi] = read_bits_from_slots(flat, hi - lo, bits_per_pixel,
+                                           slots=slots[start:stop], bitorder=eng.bitorder)
+
+    run_sharded(work, -(-num_bits // bits_per_pixel), workers)
+    return np.packbits(bits).tobytes()
@@ -0,0 +1,188 @@
+import os
+import shutil
+import struct
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image, ImageSequence, TiffImagePlugin
+from . import encryption, engines, image_ops, pipeline
+
+# ------------------------------
+# Frame-sequence containers
+# ------------------------------
+# One cipher is spread over consecutive frames. Each frame carries
+#   FRAME_HEADER (frame index, total cipher length) + its slice of the cipher
+# through the normal blue-channel pipeline (embed_array / extract_array), so
+# only the frames in flight (one per worker) are held in memory.
+#
+# Sources: a directory of PNG frames (sorted by name), a multi-frame TIFF or an
+# APNG, or any iterable of RGB arrays / encoded frames.
+# Destinations: a directory (frame_00000.png, ...) or a multi-page .tif/.tiff,
+# both written frame by frame, or a .png/.apng, which Pillow can only write
+# from the full list of frames. Output goes to a hidden temporary sibling of
+# `out` that is moved into place once every frame is written, so a failed run
+# (e.g. the frames running out) leaves no partial output behind.
+FRAME_HEADER = struct.Struct(">IQ")
+FRAME_EXTS = (".png", ".webp", ".tif", ".tiff", ".npy")
+_CODEC_EXTS = {"webp": ".webp", "npy": ".npy"}   # directory output, ".png" otherwise
+TIFF_EXTS = (".tif", ".tiff")
+APNG_EXTS = (".png", ".apng")
+
+
+def iter_frames(source):
+    """Yield uint8 RGB frames one at a time from a directory, a multi-frame file or an iterable."""
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(FRAME_EXTS):
+                    yield image_ops.load_image(os.path.join(path, name))
+            return
+        with Image.open(path) as img:
+            for frame in ImageSequence.Iterator(img):
+                yield np.array(frame.convert("RGB"), dtype=np.uint8)
+        return
+    for frame in source:
+        yield pipeline.to_rgb(frame)
+
+
+def _ordered_map(fn, items, workers: int = 1):
+    """map(fn, items) in order, with at most `workers` items in flight on a thread pool."""
+    if workers <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, *item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def frame_capacity(shape: tuple, bits_per_pixel: int = 1) -> int:
+    """Cipher bytes one frame of this shape can carry."""
+    h, w = shape[:2]
+    return max(h * w * bits_per_pixel // 8 - pipeline.HEADER_BYTES - FRAME_HEADER.size, 0)
+
+
+def _write_file_frames(stego_frames, path: str, ext: str) -> int:
+    if ext in TIFF_EXTS:
+        count = 0
+        with TiffImagePlugin.AppendingTiffWriter(path, new=True) as tf:
+            for arr in stego_frames:
+                Image.fromarray(np.ascontiguousarray(arr)).save(tf, format="TIFF")
+                tf.newFrame()
+                count += 1
+        return count
+    images = [Image.fromarray(np.ascontiguousarray(arr)) for arr in stego_frames]
+    if not images:
+        raise ValueError("No frames to embed into.")
+    images[0].save(path, format="PNG", save_all=True, append_images=images[1:])
+    return len(images)
+
+
+def _write_dir_frames(stego_frames, path: str, codec: str) -> int:
+    frame_ext = _CODEC_EXTS.get(codec, ".png")
+    count = 0
+    for index, arr in enumerate(stego_frames):
+        image_ops.save_image(arr, os.path.join(path, f"frame_{index:05d}{frame_ext}"), codec=codec)
+        count += 1
+    return count
+
+
+def _write_frames(stego_frames, out: str, codec: str = "png") -> int:
+    ext = os.path.splitext(out)[1].lower()
+    parent = os.path.dirname(os.path.abspath(out))
+    if ext in TIFF_EXTS or ext in APNG_EXTS:
+        fd, tmp = tempfile.mkstemp(suffix=ext, prefix=".frames-", dir=parent)
+        os.close(fd)
+        try:
+            count = _write_file_frames(stego_frames, tmp, ext)
+            os.replace(tmp, out)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return count
+
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".frames-", dir=parent)
+    try:
+        count = _write_dir_frames(stego_frames, tmp, codec)
+        if not os.path.isdir(out):
+            os.rename(tmp, out)
+            return count
+        for name in os.listdir(tmp):               # existing directory: frame files replace their namesakes
+            os.replace(os.path.join(tmp, name), os.path.join(out, name))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return count
+
+
+def hide_frames(frames, message, key: str, out: str, bits_per_pixel: int = 1,
+                engine: str = engines.DEFAULT_ENGINE, workers: int = 1, codec: str = "png",
+                keystream: str = encryption.DEFAULT_KEYSTREAM) -> int:
+    """
+    Encrypt message and spread it over the frames of `frames`, streaming the
+    stego frames to `out`. Frames after the payload are written unchanged.
+    Returns the number of frames written; raises ValueError if the frames run
+    out before the payload does, in which case `out` is not created or changed.
+    """
+    cipher = encryption.mle_encrypt(pipeline._to_bytes(message), key, keystream)
+    total = len(cipher)
+    offset = 0
+
+    def jobs():
+        nonlocal offset
+        for index, frame in enumerate(iter_frames(frames)):
+            if offset >= total and index > 0:
+                yield frame, None
+                continue
+            stop = min(total, offset + frame_capacity(frame.shape, bits_per_pixel))
+            yield frame, FRAME_HEADER.pack(index, total) + cipher[offset:stop]
+            offset = stop
+        if offset < total:
+            raise ValueError(f"Frames too small: {total - offset} of {total} cipher bytes did not fit.")
+
+    def embed(frame, record):
+        if record is None:
+            return frame
+        return pipeline.embed_array(frame, record, key, bits_per_pixel=bits_per_pixel, engine=engine,
+                                    keystream=keystream)
+
+    return _write_frames(_ordered_map(embed, jobs(), workers), out, codec)
+
+
+def reveal_frames(frames, key: str, bits_per_pixel: int = 1, engine: str = engines.DEFAULT_ENGINE,
+                  workers: int = 1, keystream: str = None) -> bytes:
+    """
+    Stream frames back in order, reassemble the cipher from the per-frame headers and decrypt it.
+    The keystream is read from the first frame's header (see pipeline.reveal).
+    """
+    def extract(frame):
+        return pipeline._extract_rgb(frame, key, bits_per_pixel, engine, 1)
+
+    parts, got, total = [], 0, None
+    records = _ordered_map(extract, ((f,) for f in iter_frames(frames)), workers)
+    try:
+        for index, (record, stored) in enumerate(records):
+            if index == 0:
+                keystream = pipeline.resolve_keystream(stored, keystream)
+            if len(record) < FRAME_HEADER.size:
+                raise ValueError(f"Frame {index} carries no frame header (wrong key or bits per pixel?).")
+            frame_index, frame_total = FRAME_HEADER.unpack_from(record)
+            if frame_index != index or (total is not None and frame_total != total):
+                raise ValueError(f"Frame header mismatch at frame {index} (wrong key, order or bits per pixel?).")
+            total = frame_total
+            parts.append(record[FRAME_HEADER.size:])
+            got += len(parts[-1])
+            if got >= total:
+                break
+    finally:
+        records.close()
+    if total is None or got < total:
+        raise ValueError("Frame sequence ended before the payload was complete.")
+    return encryption.mle_decrypt(b"".join(parts)[:total], key, keystream)
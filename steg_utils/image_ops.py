@@ -1,12 +1,60 @@
+import hashlib
+import os
 from PIL import Image
 import numpy as np
+from . import codecs
+from .lru import ByteBudgetLRU
 
 def load_image(path: str) -> np.ndarray:
+    if path.lower().endswith(".npy"):
+        return np.load(path, allow_pickle=False)
     img = Image.open(path).convert("RGB")
     return np.array(img, dtype=np.uint8)
 
-def save_image(arr: np.ndarray, path: str):
-    Image.fromarray(arr.astype("uint8")).save(path)
+# ------------------------------
+# Decoded-image LRU cache
+# ------------------------------
+_cache = ByteBudgetLRU(256 * 1024 * 1024)
+
+def set_image_cache_budget(max_bytes: int):
+    """Set the decoded-image cache budget in bytes (0 disables caching)."""
+    _cache.set_budget(max_bytes)
+
+def clear_image_cache():
+    _cache.clear()
+
+def image_cache_stats() -> dict:
+    """Snapshot of hits / misses / evictions / bytes / entries, plus the budget."""
+    return _cache.stats()
+
+def _image_cache_key(path: str, key_by: str):
+    if key_by == "stat":
+        st = os.stat(path)
+        return ("stat", os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if key_by == "hash":
+        with open(path, "rb") as f:
+            return ("hash", hashlib.sha256(f.read()).hexdigest())
+    raise ValueError(f"key_by must be 'stat' or 'hash', got {key_by!r}")
+
+def load_image_cached(path: str, key_by: str = "stat") -> np.ndarray:
+    """
+    Like load_image, but decoded covers are kept in an LRU cache bounded by
+    set_image_cache_budget. Keyed by (path, mtime, size) or, with key_by="hash",
+    by SHA-256 of the file contents.
+    The returned array is read-only and shared; copy it before mutating.
+    """
+    key = _image_cache_key(path, key_by)
+    return _cache.get_or_compute(key, lambda: load_image(path))
+
+def save_image(arr: np.ndarray, path: str, codec: str = None, **options):
+    """
+    Save arr with a codec from steg_utils.codecs (inferred from the extension
+    when codec is None, e.g. .png -> Pillow PNG, .webp -> lossless WebP, .npy -> raw).
+    options go to the encoder, e.g. compress_level=1 or png_filter="up" for "png-fast".
+    """
+    codec = codec or codecs.codec_for_path(path)
+    with open(path, "wb") as f:
+        codecs.write_image(arr, f, codec, **options)
 
 def flip_transpose(img_arr: np.ndarray) -> np.ndarray:
     """
@@ -50,6 +98,24 @@ def split_blue_blocks(blue: np.ndarray):
     bc4 = blue[mh:h, mw:w].copy()
     return [bc1, bc2, bc3, bc4], (mh, mw)
 
+def block_raster_indices(shape: tuple, dtype=np.int64) -> np.ndarray:
+    """
+    Flat indices of a (h, w) channel in block order BC1->BC2->BC3->BC4,
+    row-major inside each block (same split as split_blue_blocks).
+    Each block is written straight into the result, with no full-size temporaries.
+    """
+    h, w = shape
+    mh = h // 2
+    mw = w // 2
+    out = np.empty(h * w, dtype=dtype)
+    pos = 0
+    for r0, r1, c0, c1 in ((0, mh, 0, mw), (0, mh, mw, w), (mh, h, 0, mw), (mh, h, mw, w)):
+        n = (r1 - r0) * (c1 - c0)
+        np.add(np.arange(r0, r1, dtype=dtype)[:, None] * w, np.arange(c0, c1, dtype=dtype),
+               out=out[pos:pos + n].reshape(r1 - r0, c1 - c0))
+        pos += n
+    return out
+
 def combine_blue_blocks(blocks: list, shape: tuple, split_indices: tuple):
     """
     Recombine four blocks into a blue channel of given shape.
@@ -1,4 +1,4 @@
 # Make steg_utils a package and export useful symbols
-from . import magic_lsb, utils, image_ops, encryption
+from . import magic_lsb, utils, image_ops, encryption, engines, codecs, pipeline, frames, lru
 
-__all__ = ["magic_lsb", "utils", "image_ops", "encryption"]
+__all__ = ["magic_lsb", "utils", "image_ops", "encryption", "engines", "codecs", "pipeline", "frames", "lru"]
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# ------------------------------
+# Byte-bounded LRU for read-only arrays
+# ------------------------------
+def owned_nbytes(arr: np.ndarray) -> int:
+    """Bytes held by the buffer behind arr (a view's base, not the view)."""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr.nbytes
+
+class ByteBudgetLRU:
+    """
+    Thread-safe LRU of read-only ndarrays, evicting least-recently-used entries
+    once the summed owned_nbytes exceed the budget (0 disables caching).
+    Values are computed outside the lock, so two threads may compute the same
+    key once each; only the first result is kept.
+    """
+
+    def __init__(self, budget: int):
+        self._entries = OrderedDict()   # key -> read-only array, most recent last
+        self._lock = threading.Lock()
+        self._budget = int(budget)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0, "entries": 0}
+
+    def _evict_to_budget(self):
+        while self._entries and self._stats["bytes"] > self._budget:
+            _, arr = self._entries.popitem(last=False)
+            self._stats["bytes"] -= owned_nbytes(arr)
+            self._stats["evictions"] += 1
+        self._stats["entries"] = len(self._entries)
+
+    def set_budget(self, max_bytes: int):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        with self._lock:
+            self._budget = int(max_bytes)
+            self._evict_to_budget()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, budget=self._budget)
+
+    def get_or_compute(self, key, compute) -> np.ndarray:
+        """Return the cached array for key, or compute(), mark it read-only and cache it."""
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return arr
+            self._stats["misses"] += 1
+
+        arr = compute()
+        arr.flags.writeable = False
+        nbytes = owned_nbytes(arr)
+        with self._lock:
+            if key not in self._entries and nbytes <= self._budget:
+                self._entries[key] = arr
+                self._stats["bytes"] += nbytes
+                self._evict_to_budget()
+        return arr
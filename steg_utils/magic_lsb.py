@@ -1,5 +1,24 @@
 import numpy as np
 
+def odd_magic_rows(n: int, start: int, stop: int, dtype=np.int64) -> np.ndarray:
+    """
+    Rows start..stop of the odd-order Siamese magic square (start top-middle,
+    move up-right, drop down on collision), in closed form so large covers
+    neither walk n*n cells in Python nor need the whole square at once.
+    """
+    i = np.arange(start, stop, dtype=dtype)[:, None]
+    j = np.arange(n, dtype=dtype)
+    rows = i + j
+    rows += (n + 1) // 2
+    rows %= n
+    rows *= n
+    col = i + 2 * j
+    col += 1
+    col %= n
+    rows += col
+    rows += 1
+    return rows
+
 def generate_magic_square(n: int) -> np.ndarray:
     """
     Generate an n x n magic square as a NumPy array.
@@ -10,14 +29,7 @@ def generate_magic_square(n: int) -> np.ndarray:
         raise ValueError("Magic square not possible for n < 3")
 
     if n % 2 == 1:
-        magic = np.zeros((n, n), dtype=int)
-        i, j = 0, n // 2
-        for num in range(1, n * n + 1):
-            magic[i, j] = num
-            i, j = (i - 1) % n, (j + 1) % n
-            if magic[i, j] != 0:
-                i, j = (i + 2) % n, (j - 1) % n
-        return magic
+        return odd_magic_rows(n, 0, n)
 
     elif n % 4 == 0:
         magic = np.arange(1, n * n + 1).reshape(n, n)
@@ -75,6 +87,76 @@ def bits_to_bytes(bits: np.ndarray) -> bytes:
     byte_arr = np.packbits(bits)
     return byte_arr.tobytes()
 
+def _slot_shifts(lsb_count: int, bitorder: str) -> np.ndarray:
+    """
+    Bit positions (shift amounts) inside a slot, in the order bits are consumed.
+    - "big": first bit goes to the highest of the lsb_count LSBs (MSB-first chunks)
+    - "little": first bit goes to bit 0 (LSB-first)
+    """
+    if bitorder == "big":
+        return np.arange(lsb_count - 1, -1, -1, dtype=np.uint8)
+    if bitorder == "little":
+        return np.arange(lsb_count, dtype=np.uint8)
+    raise ValueError(f"bitorder must be 'big' or 'little', got {bitorder!r}")
+
+def write_bits_to_slots(pixels: np.ndarray, bits: np.ndarray, lsb_count: int,
+                        slots: np.ndarray = None, bitorder: str = "big") -> np.ndarray:
+    """
+    Shared vectorized LSB kernel: write bits into the lsb_count LSBs of pixels, in place.
+    - pixels: flat uint8 array (modified in place and returned)
+    - bits: 0/1 array, consumed lsb_count at a time per slot
+    - slots: visiting order (pixel indices); None means 0, 1, 2, ...
+    - bitorder: placement of bits inside a slot, see _slot_shifts
+    A trailing partial slot only touches the bits it carries.
+    """
+    if lsb_count < 1 or lsb_count > 8:
+        raise ValueError("lsb_count must be between 1 and 8")
+    bits = np.asarray(bits, dtype=np.uint8)
+    shifts = _slot_shifts(lsb_count, bitorder)
+    full, rem = divmod(bits.size, lsb_count)
+    capacity = pixels.size if slots is None else slots.size
+    if full + (1 if rem else 0) > capacity:
+        raise ValueError(f"Too many bits to embed ({bits.size}) for capacity {capacity * lsb_count}")
+
+    if full:
+        chunks = bits[:full * lsb_count].reshape(full, lsb_count)
+        values = np.bitwise_or.reduce(chunks << shifts, axis=1).astype(np.uint8)
+        clear = np.uint8(~((1 << lsb_count) - 1) & 0xFF)
+        if slots is None:
+            view = pixels[:full]
+            view &= clear
+            view |= values
+        else:
+            sel = slots[:full]
+            # take() gathers with int32 slots without converting them to intp first
+            pixels[sel] = (pixels.take(sel) & clear) | values
+
+    if rem:
+        tail_shifts = shifts[:rem].astype(np.int64)
+        mask = int(np.sum(1 << tail_shifts))
+        value = int(np.sum(bits[full * lsb_count:].astype(np.int64) << tail_shifts))
+        pos = full if slots is None else slots[full]
+        pixels[pos] = (int(pixels[pos]) & ~mask & 0xFF) | value
+    return pixels
+
+def read_bits_from_slots(pixels: np.ndarray, bit_count: int, lsb_count: int,
+                         slots: np.ndarray = None, bitorder: str = "big") -> np.ndarray:
+    """
+    Inverse of write_bits_to_slots: read bit_count bits (uint8 0/1 array) from pixels.
+    """
+    if lsb_count < 1 or lsb_count > 8:
+        raise ValueError("lsb_count must be between 1 and 8")
+    shifts = _slot_shifts(lsb_count, bitorder)
+    needed = (bit_count + lsb_count - 1) // lsb_count
+    capacity = pixels.size if slots is None else slots.size
+    if needed > capacity:
+        raise ValueError(f"Requested {bit_count} bits but capacity is {capacity * lsb_count}")
+    values = pixels[:needed] if slots is None else pixels.take(slots[:needed])
+    if lsb_count == 1:
+        return values[:bit_count] & 1
+    bits = ((values[:, None] >> shifts) & 1).astype(np.uint8).ravel()
+    return bits[:bit_count]
+
 def embedding_capacity(blocks: list, lsb_count: int) -> int:
     """Return total embedding capacity in bits for a list of blocks given lsb_count."""
     total_pixels = sum([b.size for b in blocks])
@@ -86,49 +168,26 @@ def embed_bits_in_blocks(blocks: list, bits: np.ndarray, lsb_count: int = 1) ->
     - blocks: [BC1, BC2, BC3, BC4] (each uint8 2D)
     - bits: numpy array of 0/1 bits (MSB-first from bytes_to_bits)
     - lsb_count: number of LSBs per pixel to use (1..4 recommended)
+    Blocks are filled in the canonical order BC1->BC2->BC3->BC4, row-major,
+    with MSB-first chunks of lsb_count bits per pixel.
     Returns modified_blocks (deep copies).
     """
     if lsb_count < 1 or lsb_count > 8:
         raise ValueError("lsb_count must be between 1 and 8")
 
-    bits = bits.astype(np.uint8)
+    bits = np.asarray(bits, dtype=np.uint8)
     capacity = embedding_capacity(blocks, lsb_count)
     if bits.size > capacity:
         raise ValueError(f"Too many bits to embed ({bits.size}) for capacity {capacity}")
 
-    # Flatten blocks in the canonical order BC1->BC2->BC3->BC4, row-major
-    flat_pixels = np.concatenate([b.flatten() for b in blocks]).astype(np.uint8)
-    mask_clear = (~((1 << lsb_count) - 1)) & 0xFF  # mask to clear LSBs
-    # Create array of the per-pixel values to write (0..(2^lsb_count-1))
-    # Group bits into chunks of lsb_count, MSB-first within each chunk
-    if bits.size == 0:
-        return [flat_pixels[0: b.size].reshape(b.shape).astype(np.uint8) for b in blocks]
-
-    # pad bits to full chunks
-    remainder = bits.size % lsb_count
-    if remainder != 0:
-        pad = lsb_count - remainder
-        bits = np.concatenate([bits, np.zeros(pad, dtype=np.uint8)])
-
-    bits_reshaped = bits.reshape(-1, lsb_count)  # each row is a chunk of lsb_count bits
-    # convert each chunk to integer (MSB-first)
-    chunk_values = np.packbits(bits_reshaped, axis=1, bitorder='big').flatten()
-    # When lsb_count < 8, packbits returns values in high bits; we need to right-shift
-    if lsb_count < 8:
-        shift = 8 - lsb_count
-        chunk_values = (chunk_values >> shift) & ((1 << lsb_count) - 1)
-    # Now place chunk_values into the first N pixels
-    num_chunks = chunk_values.size
-    flat_pixels[:num_chunks] = ((flat_pixels[:num_chunks] & mask_clear) | chunk_values).astype(np.uint8)
-
-    # reconstruct blocks
-    out_blocks = []
-    idx = 0
-    for b in blocks:
-        n = b.size
-        out_block = flat_pixels[idx:idx+n].reshape(b.shape).astype(np.uint8)
-        out_blocks.append(out_block)
-        idx += n
+    out_blocks = [b.astype(np.uint8, copy=True) for b in blocks]
+    start = 0
+    for out_block in out_blocks:
+        if start >= bits.size:
+            break
+        span = out_block.size * lsb_count
+        write_bits_to_slots(out_block.reshape(-1), bits[start:start + span], lsb_count, bitorder="big")
+        start += span
     return out_blocks
 
 def extract_bits_from_blocks(blocks: list, bit_count: int, lsb_count: int = 1) -> np.ndarray:
@@ -140,22 +199,15 @@ def extract_bits_from_blocks(blocks: list, bit_count: int, lsb_count: int = 1) -
     if bit_count > capacity:
         raise ValueError(f"Requested {bit_count} bits but capacity is {capacity}")
 
-    flat_pixels = np.concatenate([b.flatten() for b in blocks]).astype(np.uint8)
-    needed_chunks = (bit_count + lsb_count - 1) // lsb_count
-    chunk_values = (flat_pixels[:needed_chunks] & ((1 << lsb_count) - 1)).astype(np.uint8)
-
-    # Convert each chunk value into lsb_count bits (MSB-first)
-    bits_list = []
-    for val in chunk_values:
-        chunk_bits = np.unpackbits(np.array([val], dtype=np.uint8))
-        # chunk_bits is 8 bits; take the most significant lsb_count bits from left side of 8-bit pack
-        if lsb_count < 8:
-            start = 8 - lsb_count
-            chunk_bits = chunk_bits[start:start+lsb_count]
-        bits_list.append(chunk_bits)
-    if len(bits_list) == 0:
+    parts = []
+    remaining = bit_count
+    for b in blocks:
+        if remaining <= 0:
+            break
+        take = min(remaining, b.size * lsb_count)
+        flat = np.ascontiguousarray(b, dtype=np.uint8).reshape(-1)
+        parts.append(read_bits_from_slots(flat, take, lsb_count, bitorder="big"))
+        remaining -= take
+    if not parts:
         return np.zeros((0,), dtype=np.uint8)
-    bits = np.concatenate(bits_list).astype(np.uint8)
-    # truncate to requested bit_count
-    bits = bits[:bit_count]
-    return bits
+    return np.concatenate(parts)
@@ -0,0 +1,556 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from . import codecs, encryption, engines, image_ops, utils
+from .magic_lsb import write_bits_to_slots, read_bits_from_slots
+
+# ------------------------------
+# In-memory embed / extract pipeline
+# ------------------------------
+# Pure functions over bytes and arrays: nothing is written to disk, so
+# concurrent callers never share output paths.
+HEADER_BYTES = 4   # big-endian cipher length stored in front of the cipher
+# A set top bit tags the header: bits 28-30 then hold the keystream id
+# (encryption.KEYSTREAM_IDS) and bits 0-27 the length. Headers without the tag
+# are a plain length and decrypt with "repeat"; "repeat" is still written untagged.
+HEADER_TAG = 1 << 31
+HEADER_ID_SHIFT = 28
+MAX_TAGGED_LENGTH = (1 << HEADER_ID_SHIFT) - 1
+LOW_MEMORY_CHUNK_SLOTS = 1 << 16   # max slots per chunk in the low-memory embed (multiple of 8)
+
+# Payload modes, applied to the plaintext before encryption:
+#   - "plain":   message bytes as-is
+#   - "reddiff": (message - red) mod 256 against the flip-transposed red plane,
+#                which embedding leaves untouched (the extract.py scheme)
+MODES = ("plain", "reddiff")
+DEFAULT_MODE = "plain"
+
+
+def pack_header(length: int, keystream: str = encryption.DEFAULT_KEYSTREAM) -> bytes:
+    """The HEADER_BYTES header for a cipher of `length` bytes encrypted with `keystream`."""
+    keystream_id = encryption.KEYSTREAM_IDS[encryption.check_keystream(keystream)]
+    if keystream_id == 0:
+        if length >= HEADER_TAG:
+            raise ValueError(f"Cipher too long for the header: {length} bytes.")
+        return length.to_bytes(HEADER_BYTES, "big")
+    if length > MAX_TAGGED_LENGTH:
+        raise ValueError(f"Cipher too long for a tagged header: {length} bytes (max {MAX_TAGGED_LENGTH}).")
+    return (HEADER_TAG | keystream_id << HEADER_ID_SHIFT | length).to_bytes(HEADER_BYTES, "big")
+
+
+def unpack_header(header: bytes):
+    """(length, keystream) from a header; keystream is None when the header is untagged."""
+    value = int.from_bytes(header[:HEADER_BYTES], "big")
+    if not value & HEADER_TAG:
+        return value, None
+    keystream_id = (value >> HEADER_ID_SHIFT) & 0x7
+    for name, ident in encryption.KEYSTREAM_IDS.items():
+        if ident == keystream_id and ident:
+            return value & MAX_TAGGED_LENGTH, name
+    raise ValueError(f"Unknown keystream tag {keystream_id} in the header (wrong key, bits per pixel or engine?).")
+
+
+def resolve_keystream(stored: str, requested: str = None) -> str:
+    """
+    Keystream to decrypt with: the one the header names, "repeat" for an untagged
+    header, or `requested` when given (it must agree with a tagged header).
+    """
+    if requested is None:
+        return stored or encryption.LEGACY_KEYSTREAM
+    encryption.check_keystream(requested)
+    if stored is not None and stored != requested:
+        raise ValueError(f"Payload is tagged with keystream {stored!r}, not {requested!r}.")
+    return requested
+
+
+def to_rgb(image) -> np.ndarray:
+    """
+    Accept an RGB ndarray, encoded image bytes, a binary file object (e.g. BytesIO)
+    or a path, and return a uint8 RGB array. Paths go through the decoded-cover cache.
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return codecs.decode_image(bytes(image))
+    if hasattr(image, "read"):
+        return codecs.decode_image(image.read())
+    if isinstance(image, (str, os.PathLike)):
+        return image_ops.load_image_cached(os.fspath(image))
+    raise TypeError(f"Unsupported image input of type {type(image).__name__}.")
+
+
+def _to_bytes(message) -> bytes:
+    if isinstance(message, str):
+        return message.encode("utf-8")
+    return bytes(message)
+
+
+def _check_mode(mode: str):
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, choose from {list(MODES)}.")
+
+
+def _red_plane(rgb: np.ndarray) -> np.ndarray:
+    return image_ops.flip_transpose(rgb)[:, :, 0]
+
+
+def red_diff_encode(message: bytes, red: np.ndarray) -> bytes:
+    """caldiff[i] = (message[i] - red[i]) mod 256, red read row-major."""
+    red_flat = red.reshape(-1)
+    if len(message) > red_flat.size:
+        raise ValueError(f"Message of {len(message)} bytes exceeds red pixel count {red_flat.size}.")
+    msg = np.frombuffer(message, dtype=np.uint8)
+    return (msg - red_flat[:msg.size]).tobytes()       # uint8 arithmetic wraps mod 256
+
+
+def red_diff_decode(caldiff: bytes, red: np.ndarray) -> bytes:
+    """Inverse of red_diff_encode: message[i] = (caldiff[i] + red[i]) mod 256."""
+    red_flat = red.reshape(-1)
+    if len(caldiff) > red_flat.size:
+        raise ValueError("Unexpected: decrypted payload larger than red pixel count used.")
+    diff = np.frombuffer(caldiff, dtype=np.uint8)
+    return (diff + red_flat[:diff.size]).tobytes()
+
+
+def embed_array(cover_rgb: np.ndarray, cipher: bytes, key: str, bits_per_pixel: int = 1,
+                engine: str = engines.DEFAULT_ENGINE, low_memory: bool = False,
+                workers: int = 1, verify: bool = False,
+                keystream: str = encryption.DEFAULT_KEYSTREAM) -> np.ndarray:
+    """
+    Embed header + cipher into the key-shuffled blue channel; returns the stego RGB array.
+    keystream is the mode cipher was encrypted with; the header records it.
+    low_memory=True copies the cover once and embeds into that copy in place.
+    workers > 1 shards the visiting order over a thread pool (same output).
+    verify=True reads the payload back from the returned array's blue samples
+    through blue_index_map and raises RuntimeError on a mismatch.
+    """
+    if low_memory:
+        stego = np.array(cover_rgb, dtype=np.uint8, order="C", copy=True)
+        embed_array_inplace(stego, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine, workers=workers,
+                            verify=verify, keystream=keystream)
+        return stego
+    proc = image_ops.flip_transpose(cover_rgb)
+    r, g, b = image_ops.split_rgb(proc)
+    h, w = b.shape
+
+    # Split + shuffle blue
+    blocks, split_indices = image_ops.split_blue_blocks(b)
+    perm = utils.generate_perm_from_key(key)
+    shuffled = [blocks[p] for p in perm]
+    shuffled_blue = image_ops.combine_blue_blocks(shuffled, (h, w), split_indices)
+
+    payload = pack_header(len(cipher), keystream) + cipher
+    stego_shuffled_blue = engines.embed_payload(shuffled_blue, payload, bits_per_pixel=bits_per_pixel,
+                                                engine=engine, workers=workers)
+
+    # Unshuffle back to visual
+    stego_blue = utils.unshuffle_to_visual_with_indices(stego_shuffled_blue, perm, split_indices)
+    stego_proc = image_ops.merge_rgb(r, g, stego_blue)
+    stego = image_ops.inv_flip_transpose(stego_proc)
+    if verify:
+        _verify_blue_slots(stego, payload, perm, bits_per_pixel, engine, workers)
+    return stego
+
+
+def _shuffled_to_rgb_blue(slots: np.ndarray, rgb_shape: tuple, perm, proc_layout: bool = False) -> np.ndarray:
+    """
+    Map flat positions in the key-shuffled, flip-transposed blue plane to flat
+    indices of the blue samples in the original (H, W, 3) buffer, or with
+    proc_layout=True in the flip-transposed (W, H, 3) buffer.
+    Same geometry as split_blue_blocks / flip_transpose / make_shuffled_blue.
+    """
+    H, W = rgb_shape[:2]
+    h, w = W, H                             # flip_transpose swaps the axes
+    mh, mw = h // 2, w // 2
+    heights, widths = (mh, h - mh), (mw, w - mw)
+    dy = np.empty(4, dtype=np.int64)
+    dx = np.empty(4, dtype=np.int64)
+    for k, p in enumerate(perm):
+        if (heights[k // 2], widths[k % 2]) != (heights[p // 2], widths[p % 2]):
+            raise ValueError(f"Block permutation {perm} does not fit a {h}x{w} blue channel (odd dimensions).")
+        dy[k] = (p // 2 - k // 2) * mh
+        dx[k] = (p % 2 - k % 2) * mw
+
+    # in-place arithmetic keeps the temporaries to a few arrays of len(slots)
+    y, x = np.divmod(slots.astype(np.int64), w)
+    k = (y >= mh).astype(np.int8)
+    k *= 2
+    k += x >= mw
+    y += dy[k]                              # row / col in the flip-transposed plane
+    x += dx[k]
+    if proc_layout:
+        y *= w
+        y += x
+        y *= 3
+        y += 2
+        return y
+    x *= W                                  # proc[y, x] == rgb[x, W - 1 - y]
+    x += W - 1
+    x -= y
+    x *= 3
+    x += 2
+    return x
+
+
+def embed_array_inplace(rgb: np.ndarray, cipher: bytes, key: str, bits_per_pixel: int = 1,
+                        engine: str = engines.DEFAULT_ENGINE, workers: int = 1,
+                        verify: bool = False, keystream: str = encryption.DEFAULT_KEYSTREAM) -> np.ndarray:
+    """
+    Low-memory embed: same output as embed_array, but bits are written straight
+    into the blue samples of rgb (a writable, C-contiguous uint8 array), which is
+    modified and returned. No channel split, block copies, shuffled planes or
+    merge stack are made; slots are mapped to pixels and filled chunk by chunk.
+    verify=True then reads the payload back from rgb through blue_index_map
+    and raises RuntimeError on a mismatch.
+    """
+    if bits_per_pixel < 1 or bits_per_pixel > 4:
+        raise ValueError("bits_per_pixel must be between 1 and 4.")
+    if rgb.dtype != np.uint8 or not rgb.flags.c_contiguous or not rgb.flags.writeable:
+        raise ValueError("embed_array_inplace needs a writable C-contiguous uint8 array (e.g. cover.copy()).")
+    eng = engines.get_engine(engine)
+    H, W = rgb.shape[:2]
+    payload = pack_header(len(cipher), keystream) + cipher
+    total_bits = len(payload) * 8
+    capacity_bits = H * W * bits_per_pixel
+    if total_bits > capacity_bits:
+        raise ValueError(f"Payload too large: need {total_bits} bits, have {capacity_bits} bits.")
+
+    perm = utils.generate_perm_from_key(key)
+    slots = eng.slot_order((W, H))
+    flat = rgb.reshape(-1)
+    src = np.frombuffer(payload, dtype=np.uint8)
+    n_slots = -(-total_bits // bits_per_pixel)
+    # at most ~1/64 of the image per chunk, so temporaries stay small next to the image
+    chunk = max(8, min(LOW_MEMORY_CHUNK_SLOTS, H * W // 64 // 8 * 8))
+
+    def work(shard_start, shard_stop):
+        for start in range(shard_start, shard_stop, chunk):
+            stop = min(start + chunk, shard_stop)
+            bit_lo = start * bits_per_pixel
+            bit_hi = min(stop * bits_per_pixel, total_bits)
+            bits = np.unpackbits(src[bit_lo // 8:-(-bit_hi // 8)])[:bit_hi - bit_lo]
+            idx = _shuffled_to_rgb_blue(slots[start:stop], rgb.shape, perm)
+            write_bits_to_slots(flat, bits, bits_per_pixel, slots=idx, bitorder=eng.bitorder)
+
+    # shard starts are multiples of 8 slots, so every chunk starts on a payload byte
+    engines.run_sharded(work, n_slots, workers)
+    if verify:
+        _verify_blue_slots(rgb, payload, perm, bits_per_pixel, engine, workers)
+    return rgb
+
+
+def _verify_blue_slots(stego_rgb: np.ndarray, payload: bytes, perm, bits_per_pixel: int, engine: str,
+                       workers: int = 1):
+    """
+    Read payload back from the blue samples of stego_rgb (the array handed to
+    the caller) through blue_index_map, chunk by chunk; RuntimeError on a mismatch.
+    """
+    eng = engines.get_engine(engine)
+    flat, proc_layout = _blue_view(stego_rgb)
+    index_map = blue_index_map(stego_rgb.shape[:2], tuple(perm), engine, proc_layout)
+    src = np.frombuffer(payload, dtype=np.uint8)
+    total_bits = src.size * 8
+    mismatched = []
+
+    def work(shard_start, shard_stop):
+        for start in range(shard_start, shard_stop, LOW_MEMORY_CHUNK_SLOTS):
+            stop = min(start + LOW_MEMORY_CHUNK_SLOTS, shard_stop)
+            bit_lo = start * bits_per_pixel
+            bit_hi = min(stop * bits_per_pixel, total_bits)
+            bits = read_bits_from_slots(flat, bit_hi - bit_lo, bits_per_pixel, slots=index_map[start:stop],
+                                        bitorder=eng.bitorder)
+            if not np.array_equal(bits, np.unpackbits(src[bit_lo // 8:-(-bit_hi // 8)])[:bit_hi - bit_lo]):
+                mismatched.append(start)
+
+    engines.run_sharded(work, -(-total_bits // bits_per_pixel), workers)
+    if mismatched:
+        raise RuntimeError(f"Post-embed verification failed at slot {min(mismatched)} of the stego array.")
+
+
+@utils.index_cached
+def blue_index_map(rgb_shape: tuple, perm: tuple, engine: str = engines.DEFAULT_ENGINE,
+                   proc_layout: bool = False) -> np.ndarray:
+    """
+    Visiting-order slot -> flat index of its blue sample in a C-ordered (H, W, 3)
+    buffer (or the flip-transposed (W, H, 3) buffer with proc_layout=True), for
+    one quadrant permutation and engine. Built chunk-wise, kept in the utils
+    index cache (bounded by bytes) and returned read-only.
+    """
+    H, W = rgb_shape[:2]
+    slots = engines.get_engine(engine).slot_order((W, H))
+    out = np.empty(slots.size, dtype=np.int32 if H * W * 3 < 2 ** 31 else np.int64)
+    for start in range(0, slots.size, LOW_MEMORY_CHUNK_SLOTS):
+        stop = start + LOW_MEMORY_CHUNK_SLOTS
+        out[start:stop] = _shuffled_to_rgb_blue(slots[start:stop], (H, W), perm, proc_layout)
+    return out
+
+
+def _blue_view(rgb: np.ndarray):
+    """
+    (flat uint8 buffer, proc_layout) reaching the blue samples of rgb in place.
+    embed_array returns an inv_flip_transpose view, so its contiguous base is
+    used directly (proc_layout=True).
+    """
+    proc = image_ops.flip_transpose(rgb)
+    if rgb.dtype == np.uint8 and rgb.flags.c_contiguous:
+        return rgb.reshape(-1), False
+    if rgb.dtype == np.uint8 and proc.flags.c_contiguous:
+        return proc.reshape(-1), True
+    raise ValueError("In-place update needs a C-contiguous uint8 array (or a flip_transpose view of one).")
+
+
+def verify_array(stego_rgb: np.ndarray, cipher: bytes, key: str, bits_per_pixel: int = 1,
+                 engine: str = engines.DEFAULT_ENGINE, workers: int = 1,
+                 keystream: str = encryption.DEFAULT_KEYSTREAM) -> bool:
+    """
+    True if stego_rgb carries header + cipher for this key: the extract_array
+    read path, minus the separate header pass. Used on decoded images; embeds
+    verify the slots they just wrote instead (embed_array(verify=True)).
+    """
+    payload = pack_header(len(cipher), keystream) + cipher
+    blue = image_ops.flip_transpose(stego_rgb)[:, :, 2]
+    if len(payload) * 8 > blue.size * bits_per_pixel:
+        return False
+    shuffled_blue = utils.make_shuffled_blue(blue, utils.generate_perm_from_key(key))
+    return engines.extract_payload_bits(shuffled_blue, len(payload) * 8, bits_per_pixel=bits_per_pixel,
+                                        engine=engine, workers=workers) == payload
+
+
+def update_array(stego_rgb: np.ndarray, cipher: bytes, key: str, bits_per_pixel: int = 1,
+                 engine: str = engines.DEFAULT_ENGINE, in_place: bool = False,
+                 keystream: str = encryption.DEFAULT_KEYSTREAM, scrub_tail: bool = False, rng=None):
+    """
+    Replace the payload of an existing stego array with header + cipher, writing
+    only the slots whose bits differ from what is embedded now. Slots past the
+    new payload are left as they are (the header bounds what extraction reads),
+    so a shorter message leaves the end of the old cipher readable as a stale
+    tail; scrub_tail=True overwrites that tail (up to the old header's length)
+    with random bits from rng (a numpy Generator, fresh by default).
+    With in_place=True (and a cached blue_index_map) the cost scales with the
+    payload and the changed slots, not the image; otherwise the array is copied first.
+    Returns (stego, stats) with payload_slots, changed_slots, changed_bits,
+    old_length (None if the current header is not plausible), new_length,
+    stale_tail_slots (old payload slots past the new one still holding old
+    bits; None when old_length is) and scrubbed_slots.
+    """
+    if bits_per_pixel < 1 or bits_per_pixel > 4:
+        raise ValueError("bits_per_pixel must be between 1 and 4.")
+    eng = engines.get_engine(engine)
+    H, W = stego_rgb.shape[:2]
+    payload = pack_header(len(cipher), keystream) + cipher
+    total_bits = len(payload) * 8
+    capacity_bits = H * W * bits_per_pixel
+    if total_bits > capacity_bits:
+        raise ValueError(f"Payload too large: need {total_bits} bits, have {capacity_bits} bits.")
+
+    stego = stego_rgb if in_place else np.array(stego_rgb, dtype=np.uint8, order="C")
+    flat, proc_layout = _blue_view(stego)
+    index_map = blue_index_map((H, W), tuple(utils.generate_perm_from_key(key)), engine, proc_layout)
+    n_slots = -(-total_bits // bits_per_pixel)
+    slots = index_map[:n_slots]
+
+    old_bits = read_bits_from_slots(flat, n_slots * bits_per_pixel, bits_per_pixel, slots=slots,
+                                    bitorder=eng.bitorder)
+    new_bits = old_bits.copy()              # a trailing partial slot keeps its unused bits
+    new_bits[:total_bits] = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+    diff = (old_bits != new_bits).reshape(n_slots, bits_per_pixel)
+    changed = diff[:, 0].copy()             # column-wise OR beats any(axis=1) on 1-4 wide rows
+    for k in range(1, bits_per_pixel):
+        changed |= diff[:, k]
+    write_bits_to_slots(flat, new_bits.reshape(n_slots, bits_per_pixel)[changed].ravel(), bits_per_pixel,
+                        slots=slots[changed], bitorder=eng.bitorder)
+
+    try:
+        old_length, _ = unpack_header(np.packbits(old_bits[:HEADER_BYTES * 8]).tobytes())
+    except ValueError:
+        old_length = None
+    if old_length is not None and old_length > capacity_bits // 8 - HEADER_BYTES:
+        old_length = None
+
+    stale, scrubbed = None, 0
+    if old_length is not None:
+        old_slots = -(-(HEADER_BYTES + old_length) * 8 // bits_per_pixel)
+        stale = max(old_slots - n_slots, 0)
+        if scrub_tail and stale:
+            rng = rng or np.random.default_rng()
+            write_bits_to_slots(flat, rng.integers(0, 2, stale * bits_per_pixel, dtype=np.uint8), bits_per_pixel,
+                                slots=index_map[n_slots:old_slots], bitorder=eng.bitorder)
+            stale, scrubbed = 0, stale
+    stats = {
+        "payload_slots": n_slots,
+        "changed_slots": int(np.count_nonzero(changed)),
+        "changed_bits": int(np.count_nonzero(diff)),
+        "old_length": old_length,
+        "new_length": len(cipher),
+        "stale_tail_slots": stale,
+        "scrubbed_slots": scrubbed,
+    }
+    return stego, stats
+
+
+def update_file(path: str, message, key: str, bits_per_pixel: int = 1,
+                engine: str = engines.DEFAULT_ENGINE, codec: str = None,
+                keystream: str = encryption.DEFAULT_KEYSTREAM, scrub_tail: bool = False,
+                **codec_options) -> dict:
+    """
+    Rotate the message stored in a plain-mode stego image file. .npy files are memory-mapped
+    and patched in place (only changed samples are written); other formats are
+    decoded, updated and re-encoded, and left untouched when nothing changed.
+    keystream is recorded in the new header, so readers pick it up themselves.
+    scrub_tail overwrites the rest of a longer old payload (see update_array).
+    Returns the update_array stats.
+    """
+    cipher = encryption.mle_encrypt(_to_bytes(message), key, keystream)
+    if path.lower().endswith(".npy"):
+        arr = np.load(path, mmap_mode="r+", allow_pickle=False)
+        _, stats = update_array(arr, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine, in_place=True,
+                                keystream=keystream, scrub_tail=scrub_tail)
+        arr.flush()
+        return stats
+    arr = image_ops.load_image(path)
+    _, stats = update_array(arr, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine, in_place=True,
+                            keystream=keystream, scrub_tail=scrub_tail)
+    if stats["changed_slots"] or stats["scrubbed_slots"]:
+        image_ops.save_image(arr, path, codec, **codec_options)
+    return stats
+
+
+def _check_verified(stego_rgb, cipher, key, bits_per_pixel, engine, workers, keystream, what="stego array"):
+    if not verify_array(stego_rgb, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine, workers=workers,
+                        keystream=keystream):
+        raise RuntimeError(f"Post-embed verification failed: {what} does not carry the payload.")
+
+
+def _extract_blue(blue: np.ndarray, perm, bits_per_pixel: int, engine: str, workers: int):
+    """
+    (cipher bytes, header keystream or None if untagged) stored in a
+    flip-transposed blue plane under one quadrant permutation.
+    """
+    shuffled_blue = utils.make_shuffled_blue(blue, perm)
+
+    header_bits = HEADER_BYTES * 8
+    header = engines.extract_payload_bits(shuffled_blue, header_bits, bits_per_pixel=bits_per_pixel, engine=engine)
+    cipher_len, keystream = unpack_header(header)
+    max_len = shuffled_blue.size * bits_per_pixel // 8 - HEADER_BYTES
+    if cipher_len > max_len:
+        raise ValueError(f"Header claims {cipher_len} bytes but capacity is {max_len} "
+                         "(wrong key, bits per pixel or engine?).")
+
+    combined = engines.extract_payload_bits(shuffled_blue, header_bits + cipher_len * 8,
+                                            bits_per_pixel=bits_per_pixel, engine=engine, workers=workers)
+    return combined[HEADER_BYTES:HEADER_BYTES + cipher_len], keystream
+
+
+def _extract_rgb(stego_rgb: np.ndarray, key: str, bits_per_pixel: int, engine: str, workers: int):
+    proc = image_ops.flip_transpose(stego_rgb)
+    return _extract_blue(proc[:, :, 2], utils.generate_perm_from_key(key), bits_per_pixel, engine, workers)
+
+
+def extract_array(stego_rgb: np.ndarray, key: str, bits_per_pixel: int = 1,
+                  engine: str = engines.DEFAULT_ENGINE, workers: int = 1) -> bytes:
+    """Inverse of embed_array: return the cipher bytes stored in a stego RGB array."""
+    return _extract_rgb(stego_rgb, key, bits_per_pixel, engine, workers)[0]
+
+
+def extract_many(stego_rgb: np.ndarray, keys, bits_per_pixel: int = 1,
+                 engine: str = engines.DEFAULT_ENGINE, workers: int = 1) -> dict:
+    """
+    extract_array for many candidate keys at once. Keys only matter through their
+    quadrant permutation (at most 24 distinct), so each permutation's header and
+    cipher are read once and shared. Returns {key: cipher, or None when the
+    header is not plausible for that key's permutation}.
+    """
+    return {key: record[0] if record else None
+            for key, record in _extract_records(stego_rgb, keys, bits_per_pixel, engine, workers).items()}
+
+
+def _extract_records(stego_rgb, keys, bits_per_pixel, engine, workers) -> dict:
+    """extract_many, keeping each permutation's header keystream: {key: (cipher, keystream) or None}."""
+    blue = image_ops.flip_transpose(stego_rgb)[:, :, 2]
+    groups = {}
+    for key in dict.fromkeys(keys):
+        groups.setdefault(tuple(utils.generate_perm_from_key(key)), []).append(key)
+
+    out = {}
+    for perm, members in groups.items():
+        try:
+            record = _extract_blue(blue, list(perm), bits_per_pixel, engine, workers)
+        except ValueError:              # implausible header, or a layout odd dimensions rule out
+            record = None
+        out.update(dict.fromkeys(members, record))
+    return out
+
+
+def hide(cover, message, key: str, bits_per_pixel: int = 1, engine: str = engines.DEFAULT_ENGINE,
+         codec: str = "png", mode: str = DEFAULT_MODE, low_memory: bool = False, workers: int = 1,
+         verify: bool = False, verify_encoded: bool = False,
+         keystream: str = encryption.DEFAULT_KEYSTREAM, **codec_options) -> bytes:
+    """
+    Encrypt message (str or bytes), embed it into cover and return the encoded
+    stego image bytes (PNG by default, see steg_utils.codecs).
+    verify checks the in-memory stego array; verify_encoded also decodes the
+    returned bytes and checks those. keystream picks the encryption keystream
+    (see encryption.KEYSTREAMS); it is recorded in the header, so reveal finds it.
+    """
+    _check_mode(mode)
+    cover_rgb = to_rgb(cover)
+    plain = _to_bytes(message)
+    if mode == "reddiff":
+        plain = red_diff_encode(plain, _red_plane(cover_rgb))
+    cipher = encryption.mle_encrypt(plain, key, keystream)
+    stego = embed_array(cover_rgb, cipher, key, bits_per_pixel=bits_per_pixel, engine=engine,
+                        low_memory=low_memory, workers=workers, verify=verify, keystream=keystream)
+    data = codecs.encode_image(stego, codec, **codec_options)
+    if verify_encoded:
+        _check_verified(codecs.decode_image(data), cipher, key, bits_per_pixel, engine, workers, keystream,
+                        what=f"{codec} output")
+    return data
+
+
+def reveal(stego, key: str, bits_per_pixel: int = 1, engine: str = engines.DEFAULT_ENGINE,
+           mode: str = DEFAULT_MODE, workers: int = 1, keystream: str = None) -> bytes:
+    """
+    Extract and decrypt the message from stego image bytes, a file object, an array or a path.
+    The keystream comes from the header (untagged images use "repeat"); passing
+    keystream forces it for untagged images and must agree with a tagged one.
+    """
+    _check_mode(mode)
+    stego_rgb = to_rgb(stego)
+    cipher, stored = _extract_rgb(stego_rgb, key, bits_per_pixel, engine, workers)
+    plain = encryption.mle_decrypt(cipher, key, resolve_keystream(stored, keystream))
+    if mode == "reddiff":
+        plain = red_diff_decode(plain, _red_plane(stego_rgb))
+    return plain
+
+
+def reveal_many(stego, keys, bits_per_pixel: int = 1, engine: str = engines.DEFAULT_ENGINE,
+                mode: str = DEFAULT_MODE, workers: int = 1, keystream: str = None) -> dict:
+    """
+    reveal for many candidate keys against one image (e.g. reconciling assets with
+    lost key metadata). The image is decoded once, extraction runs once per
+    distinct quadrant permutation (extract_many) and only decryption runs per key,
+    on `workers` threads. Returns {key: message, or None when no plausible
+    payload exists under that key, or whose tagged keystream disagrees with
+    `keystream`}. There is no integrity check, so a wrong key whose permutation
+    matches still yields (garbage) bytes.
+    """
+    _check_mode(mode)
+    stego_rgb = to_rgb(stego)
+    ciphers = _extract_records(stego_rgb, keys, bits_per_pixel, engine, workers)
+    red = _red_plane(stego_rgb) if mode == "reddiff" else None
+
+    def decrypt(key):
+        if ciphers[key] is None:
+            return None
+        cipher, stored = ciphers[key]
+        try:
+            stream = resolve_keystream(stored, keystream)
+        except ValueError:
+            return None
+        plain = encryption.mle_decrypt(cipher, key, stream)
+        return red_diff_decode(plain, red) if red is not None else plain
+
+    if workers <= 1 or len(ciphers) <= 1:
+        return {key: decrypt(key) for key in ciphers}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(ciphers, pool.map(decrypt, ciphers)))
@@ -1,8 +1,11 @@
 import os
+import inspect
+from functools import wraps
 import numpy as np
 import hashlib
-from .magic_lsb import generate_magic_square
+from .magic_lsb import odd_magic_rows, write_bits_to_slots, read_bits_from_slots
 from .image_ops import split_blue_blocks, combine_blue_blocks
+from .lru import ByteBudgetLRU
 
 # ------------------------------
 # Blue-block shuffling helpers
@@ -55,26 +58,81 @@ def generate_perm_from_key(key: str):
     return rng.permutation(4).tolist()
 
 
+# ------------------------------
+# Index-array cache
+# ------------------------------
+# Visiting orders and slot -> pixel maps hold one index per pixel, so they share
+# one LRU cache bounded by bytes (like the decoded-image cache in image_ops).
+_index_cache = ByteBudgetLRU(128 * 1024 * 1024)
+
+def set_index_cache_budget(max_bytes: int):
+    """Set the index-array cache budget in bytes (0 disables caching)."""
+    _index_cache.set_budget(max_bytes)
+
+def clear_index_cache():
+    _index_cache.clear()
+
+def index_cache_stats() -> dict:
+    """Snapshot of hits / misses / evictions / bytes / entries, plus the budget."""
+    return _index_cache.stats()
+
+def index_cached(fn):
+    """
+    Cache fn's ndarray result in the shared index cache, read-only. Arguments
+    are bound to fn's signature with defaults applied, so positional, keyword
+    and defaulted calls share one entry; bound values must be hashable.
+    """
+    sig = inspect.signature(fn)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (fn.__module__, fn.__qualname__, tuple(bound.arguments.items()))
+        return _index_cache.get_or_compute(key, lambda: fn(*bound.args, **bound.kwargs))
+    return wrapper
+
+
 # ------------------------------
 # Magic-square-based visiting order
 # ------------------------------
-# utils.py
-import numpy as np
-from .magic_lsb import generate_magic_square
+MAGIC_CHUNK_CELLS = 1 << 16     # magic-square cells built per step
 
+@index_cached
 def generate_magic_indices(size: int) -> np.ndarray:
     # Magic-square visiting order -> single full permutation of [0..size-1]
+    # Cached per size and returned read-only; int32 whenever it fits. Built in
+    # row chunks straight into the result buffer, so the first call peaks at
+    # about one index per cell plus a chunk of temporaries.
     n = int(np.ceil(np.sqrt(size)))
     if n % 2 == 0:
         n += 1
-    M = generate_magic_square(n)            # values 1..n^2
-    order = np.argsort(M, axis=None)        # sort by magic value
-    perm = order[order < size]              # take first `size` unique indices
-    return perm.astype(np.int64)
+    dtype = np.int32 if n * n < 2 ** 31 else np.int64
+    # the square holds each of 1..n^2 once, so its inverse permutation is the order
+    order = np.empty(n * n, dtype=dtype)
+    step = max(n, min(MAGIC_CHUNK_CELLS, n * n // 64))   # small next to the result, too
+    rows = step // n
+    for start in range(0, n, rows):
+        stop = min(n, start + rows)
+        vals = odd_magic_rows(n, start, stop, dtype)
+        vals -= 1
+        order[vals.ravel()] = np.arange(start * n, stop * n, dtype=dtype)
+    # keep the first `size` unique indices, compacting in place
+    kept = 0
+    for start in range(0, n * n, step):
+        chunk = order[start:start + step]
+        keep = chunk[chunk < size]
+        order[kept:kept + keep.size] = keep
+        kept += keep.size
+    return order[:size]
 # ------------------------------
 # LSB embedding / extraction
 # ------------------------------
 def embed_payload_in_channel(channel: np.ndarray, payload: bytes, bits_per_pixel: int = 2) -> np.ndarray:
+    """
+    Magic-order engine: visit pixels in generate_magic_indices order and write
+    bits LSB-first inside each pixel (bit 0 first).
+    """
     if bits_per_pixel < 1 or bits_per_pixel > 4:
         raise ValueError("bits_per_pixel must be between 1 and 4.")
 
@@ -86,43 +144,15 @@ def embed_payload_in_channel(channel: np.ndarray, payload: bytes, bits_per_pixel
 
     bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
     indices = generate_magic_indices(flat.size)
-
-    new_flat = flat.copy()
-    bit_idx = 0
-    for idx in indices:
-        for b in range(bits_per_pixel):
-            if bit_idx >= total_bits:
-                break
-            mask = np.uint8(~(1 << b) & 0xFF)
-            new_flat[idx] = np.uint8(new_flat[idx] & mask)
-            new_flat[idx] = np.uint8(new_flat[idx] | ((bits[bit_idx] & 1) << b))
-            bit_idx += 1
-        if bit_idx >= total_bits:
-            break
-
-    return new_flat.reshape(channel.shape)
+    write_bits_to_slots(flat, bits, bits_per_pixel, slots=indices, bitorder="little")
+    return flat.reshape(channel.shape)
 
 
 def extract_bits_from_channel(channel: np.ndarray, num_bits: int, bits_per_pixel: int = 2) -> bytes:
     if bits_per_pixel < 1 or bits_per_pixel > 4:
         raise ValueError("bits_per_pixel must be between 1 and 4.")
 
-    flat = channel.flatten().astype(np.uint8)
+    flat = channel.reshape(-1).astype(np.uint8, copy=False)
     indices = generate_magic_indices(flat.size)
-
-    bits = []
-    bit_idx = 0
-    for idx in indices:
-        for b in range(bits_per_pixel):
-            if bit_idx >= num_bits:
-                break
-            bits.append((flat[idx] >> b) & 1)
-            bit_idx += 1
-        if bit_idx >= num_bits:
-            break
-
-    bits_arr = np.array(bits, dtype=np.uint8)
-    pad = (-len(bits_arr)) % 8
-    if pad:
-        bits_arr = np.concatenate([bits_arr, np.zeros(pad, dtype=np.uint8)])
+    bits_arr = read_bits_from_slots(flat, num_bits, bits_per_pixel, slots=indices, bitorder="little")
     return np.packbits(bits_arr).tobytes()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# steg_utils is imported from the repository root, as main.py / benchmark.py do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
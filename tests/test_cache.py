@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from steg_utils import engines, pipeline, utils
+from steg_utils.lru import ByteBudgetLRU
+
+
+def test_lru_evicts_least_recent_to_budget():
+    cache = ByteBudgetLRU(250)
+    for key in "abc":
+        cache.get_or_compute(key, lambda: np.zeros(100, np.uint8))
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 200, 1)
+    cache.get_or_compute("b", lambda: pytest.fail("b should be cached"))
+    cache.set_budget(100)
+    assert cache.stats()["entries"] == 1
+    cache.get_or_compute("b", lambda: pytest.fail("b is most recent and should survive"))
+
+
+def test_lru_counts_owned_bytes_and_skips_oversize():
+    cache = ByteBudgetLRU(1000)
+    view = cache.get_or_compute("view", lambda: np.zeros(800, np.uint8)[:10])
+    assert not view.flags.writeable
+    assert cache.stats()["bytes"] == 800
+    cache.get_or_compute("big", lambda: np.zeros(2000, np.uint8))
+    assert cache.stats()["entries"] == 1
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0, "entries": 0, "budget": 1000}
+    with pytest.raises(ValueError):
+        cache.set_budget(-1)
+
+
+def test_index_cached_binds_keywords_and_defaults():
+    utils.clear_index_cache()
+    perm = (2, 0, 3, 1)
+    a = pipeline.blue_index_map((8, 6), perm)
+    before = utils.index_cache_stats()
+    b = pipeline.blue_index_map((8, 6), perm, engine=engines.DEFAULT_ENGINE)
+    c = pipeline.blue_index_map(rgb_shape=(8, 6), perm=perm, proc_layout=False)
+    assert a is b is c
+    after = utils.index_cache_stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (0, 2)
+    assert pipeline.blue_index_map((8, 6), perm, proc_layout=True) is not a
+    with pytest.raises(TypeError):
+        pipeline.blue_index_map((8, 6), perm, colour="blue")
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from steg_utils import image_ops
+
+main = pytest.importorskip("main")          # needs the plotting / metrics dependencies
+
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.png"
+    image_ops.save_image(np.random.default_rng(0).integers(0, 256, (40, 32, 3), dtype=np.uint8), str(path))
+    return str(path)
+
+
+def test_hide_and_reveal_through_files(tmp_path, cover):
+    secret, stego, out = tmp_path / "secret.txt", str(tmp_path / "stego.png"), str(tmp_path / "out.txt")
+    secret.write_bytes(b"cli message")
+    main.run_cli(["hide", "--key", "K", "--cover", cover, "--input", str(secret), "--output", stego])
+    main.run_cli(["reveal", "--key", "K", "--input", stego, "--output", out])
+    assert open(out, "rb").read() == b"cli message"
+
+
+@pytest.mark.parametrize("argv", [
+    ["reveal", "--key", "K", "--input", "{cover}"],                              # no payload under this key
+    ["hide", "--key", "K", "--cover", "{missing}", "--input", "{cover}"],        # missing cover
+    ["hide", "--key", "K", "--cover", "{cover}", "--input", "{cover}", "--bpp", "1"],   # payload too large
+])
+def test_errors_exit_with_one_line_on_stderr(tmp_path, cover, capsys, argv):
+    argv = [a.format(cover=cover, missing=str(tmp_path / "missing.png")) for a in argv]
+    with pytest.raises(SystemExit) as exc:
+        main.run_cli(argv)
+    assert exc.value.code == 1
+    err = capsys.readouterr().err
+    assert err.startswith(f"[!] {argv[0]}: ") and err.count("\n") == 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from steg_utils import codecs, image_ops
+
+
+def _image(shape=(37, 23, 3), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("codec", list(codecs.CODECS))
+def test_codecs_are_lossless(codec):
+    if codec == "png-cv2":
+        pytest.importorskip("cv2")
+    arr = _image()
+    assert np.array_equal(codecs.decode_image(codecs.encode_image(arr, codec)), arr)
+
+
+@pytest.mark.parametrize("png_filter", list(codecs.PNG_FILTERS))
+@pytest.mark.parametrize("compress_level", [0, 1, 9])
+def test_fast_png_filters_are_lossless(png_filter, compress_level):
+    arr = _image(seed=len(png_filter))
+    arr[:5] = 255                               # saturated rows exercise the uint8 wrap in the predictors
+    data = codecs.encode_image(arr, "png-fast", png_filter=png_filter, compress_level=compress_level)
+    assert np.array_equal(codecs.decode_image(data), arr)
+
+
+def test_fast_png_rejects_unknown_filters_and_codecs():
+    with pytest.raises(ValueError, match="Unknown PNG filter"):
+        codecs.encode_image(_image(), "png-fast", png_filter="median")
+    with pytest.raises(ValueError, match="Unknown codec"):
+        codecs.encode_image(_image(), "jpeg")
+
+
+@pytest.mark.parametrize("path, codec", [("a.png", "png"), ("dir/A.WEBP", "webp"), ("x.npy", "npy")])
+def test_codec_for_path(path, codec):
+    assert codecs.codec_for_path(path) == codec
+
+
+@pytest.mark.parametrize("name", ["stego.bmp", "stego.jpg", "stego"])
+def test_save_image_rejects_unknown_extensions(tmp_path, name):
+    path = tmp_path / name
+    with pytest.raises(ValueError, match="No codec"):
+        image_ops.save_image(_image(), str(path))
+    assert not path.exists()
+    image_ops.save_image(_image(), str(path), codec="png")      # an explicit codec still works
+    assert np.array_equal(image_ops.load_image(str(path)), _image())
+
+
+@pytest.mark.parametrize("ext", [".png", ".webp", ".npy"])
+def test_save_and_load_round_trip(tmp_path, ext):
+    path = str(tmp_path / f"stego{ext}")
+    image_ops.save_image(_image(), path)
+    assert np.array_equal(image_ops.load_image(path), _image())
@@ -0,0 +1,100 @@
+import hashlib
+import numpy as np
+import pytest
+from steg_utils import encryption, pipeline
+
+
+def _message(n, seed=3):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+
+def _mle_byte(b):
+    shifted = ((b << 1) & 0xFF) | (b >> 7)
+    hi, lo = shifted >> 4, shifted & 0x0F
+    return ((lo ^ hi) << 4) | hi
+
+
+# ---- keystreams ----
+@pytest.mark.parametrize("mode", list(encryption.KEYSTREAMS))
+def test_keystream_is_seekable(mode):
+    full = encryption._key_stream("k", 70000, mode)
+    assert len(full) == 70000
+    for offset in (0, 1, 31, 64, 3000, 65535, 65537):
+        assert encryption._key_stream("k", 1000, mode, offset) == full[offset:offset + 1000]
+
+
+@pytest.mark.parametrize("mode, new_hash", [("sha256-ctr-v1", hashlib.sha256), ("blake2b-ctr-v1", hashlib.blake2b)])
+def test_digest_modes_hash_prefix_and_counter(mode, new_hash):
+    size, fill = encryption.KEYSTREAMS[mode]("key")
+    first, count = 5, encryption.CTR_BATCH + 3
+    expected = b"".join(new_hash(encryption.KEYSTREAM_DOMAIN + b"key" + c.to_bytes(8, "big")).digest()
+                        for c in range(first, first + count))
+    assert fill(first, count) == expected and size == new_hash().digest_size
+
+
+def test_unknown_keystream():
+    with pytest.raises(ValueError, match="Unknown keystream"):
+        encryption.mle_encrypt(b"x", "k", "rot13")
+
+
+# ---- MLE transform ----
+def test_mle_matches_bytewise_reference():
+    data = bytes(range(256)) * 3 + b"\x81\x7f\x00"
+    stream = encryption._key_stream("k", len(data), "repeat")
+    expected = bytes(_mle_byte(b) ^ k for b, k in zip(data, stream))
+    assert encryption.mle_encrypt(data, "k", "repeat") == expected
+
+
+@pytest.mark.parametrize("mode", list(encryption.KEYSTREAMS))
+@pytest.mark.parametrize("n", [0, 1, 7, 8, 9, (encryption.MLE_CHUNK_LANES * 8) + 5])
+def test_mle_round_trip(mode, n):
+    msg = _message(n)
+    assert encryption.mle_decrypt(encryption.mle_encrypt(msg, "k", mode, 17), "k", mode, 17) == msg
+
+
+# ---- header tag ----
+@pytest.mark.parametrize("mode", list(encryption.KEYSTREAMS))
+def test_header_round_trip(mode):
+    header = pipeline.pack_header(12345, mode)
+    stored = None if mode == encryption.LEGACY_KEYSTREAM else mode
+    assert pipeline.unpack_header(header) == (12345, stored)
+
+
+def test_header_limits_and_unknown_tag():
+    assert pipeline.pack_header(77, "repeat") == (77).to_bytes(4, "big")
+    with pytest.raises(ValueError, match="too long"):
+        pipeline.pack_header(pipeline.MAX_TAGGED_LENGTH + 1, "shake256-ctr-v1")
+    with pytest.raises(ValueError, match="Unknown keystream tag"):
+        pipeline.unpack_header((pipeline.HEADER_TAG | 7 << pipeline.HEADER_ID_SHIFT).to_bytes(4, "big"))
+
+
+def _cover(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (48, 40, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("mode", list(encryption.KEYSTREAMS))
+def test_reveal_reads_keystream_from_header(mode):
+    png = pipeline.hide(_cover(), b"tagged message", "k", keystream=mode)
+    assert pipeline.reveal(png, "k") == b"tagged message"
+    assert pipeline.reveal(png, "k", keystream=mode) == b"tagged message"
+
+
+def test_new_embeds_default_to_a_counter_mode():
+    stego = pipeline.embed_array(_cover(), encryption.mle_encrypt(b"hello", "k"), "k")
+    assert pipeline._extract_rgb(stego, "k", 1, "magic", 1)[1] == encryption.DEFAULT_KEYSTREAM != "repeat"
+    assert pipeline.reveal(stego, "k") == b"hello"
+
+
+def test_untagged_payloads_stay_readable():
+    # an image from before the tag: plain length header, any keystream agreed out of band
+    cipher = encryption.mle_encrypt(b"old image", "k", "sha256-ctr-v1")
+    stego = pipeline.embed_array(_cover(), cipher, "k", keystream="repeat")
+    assert pipeline.reveal(stego, "k", keystream="sha256-ctr-v1") == b"old image"
+    legacy = pipeline.embed_array(_cover(), encryption.mle_encrypt(b"legacy", "k", "repeat"), "k", keystream="repeat")
+    assert pipeline.reveal(legacy, "k") == b"legacy"
+
+
+def test_reveal_rejects_a_conflicting_keystream():
+    png = pipeline.hide(_cover(), b"msg", "k", keystream="blake2b-ctr-v1")
+    with pytest.raises(ValueError, match="tagged with keystream"):
+        pipeline.reveal(png, "k", keystream="shake256-ctr-v1")
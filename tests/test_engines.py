@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+from steg_utils import engines, image_ops, utils
+from steg_utils.magic_lsb import (embed_bits_in_blocks, extract_bits_from_blocks, generate_magic_square,
+                                  read_bits_from_slots, write_bits_to_slots)
+
+SHAPES = [(1, 1), (3, 5), (7, 4), (9, 9), (16, 16), (31, 17)]
+BPPS = [1, 2, 3, 4]
+
+
+def _channel(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def _payload(n, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+
+def _payload_sizes(shape, bpp):
+    capacity = shape[0] * shape[1] * bpp // 8
+    return sorted({0, min(1, capacity), capacity // 2, capacity})
+
+
+# ---- reference implementations (the original per-pixel / per-bit code) ----
+def _legacy_magic_square(n):
+    magic = np.zeros((n, n), dtype=int)
+    i, j = 0, n // 2
+    for num in range(1, n * n + 1):
+        magic[i, j] = num
+        i, j = (i - 1) % n, (j + 1) % n
+        if magic[i, j] != 0:
+            i, j = (i + 2) % n, (j - 1) % n
+    return magic
+
+
+def _legacy_magic_indices(size):
+    n = int(np.ceil(np.sqrt(size)))
+    if n % 2 == 0:
+        n += 1
+    order = np.argsort(_legacy_magic_square(n), axis=None)
+    return order[order < size]
+
+
+def _legacy_magic_embed(channel, payload, bpp):
+    flat = channel.flatten().astype(np.uint8)
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+    bit_idx = 0
+    for idx in _legacy_magic_indices(flat.size):
+        for b in range(bpp):
+            if bit_idx >= bits.size:
+                break
+            flat[idx] = (int(flat[idx]) & ~(1 << b) & 0xFF) | (int(bits[bit_idx]) << b)
+            bit_idx += 1
+        if bit_idx >= bits.size:
+            break
+    return flat.reshape(channel.shape)
+
+
+# ---- engines ----
+@pytest.mark.parametrize("engine", list(engines.ENGINES))
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("bpp", BPPS)
+def test_engine_round_trip(engine, shape, bpp):
+    channel = _channel(shape)
+    for n in _payload_sizes(shape, bpp):
+        payload = _payload(n)
+        stego = engines.embed_payload(channel, payload, bpp, engine=engine)
+        assert stego.shape == channel.shape and stego.dtype == np.uint8
+        assert not ((stego ^ channel) >> bpp).any()          # only the low bpp bits may change
+        assert engines.extract_payload_bits(stego, n * 8, bpp, engine=engine) == payload
+
+
+@pytest.mark.parametrize("engine", list(engines.ENGINES))
+def test_engine_rejects_oversized_payload(engine):
+    channel = _channel((9, 7))
+    with pytest.raises(ValueError):
+        engines.embed_payload(channel, _payload(9 * 7 * 3 // 8 + 1), 3, engine=engine)
+    with pytest.raises(ValueError):
+        engines.extract_payload_bits(channel, 9 * 7 * 3 + 1, 3, engine=engine)
+
+
+@pytest.mark.parametrize("engine", list(engines.ENGINES))
+@pytest.mark.parametrize("bpp", [1, 3])
+def test_engine_workers_bit_identical(engine, bpp):
+    channel = _channel((401, 389))                         # > 2 * MIN_SHARD_SLOTS slots
+    payload = _payload(channel.size * bpp // 8)
+    ref = engines.embed_payload(channel, payload, bpp, engine=engine)
+    assert np.array_equal(engines.embed_payload(channel, payload, bpp, engine=engine, workers=4), ref)
+    assert engines.extract_payload_bits(ref, len(payload) * 8, bpp, engine=engine, workers=4) == payload
+
+
+@pytest.mark.parametrize("n", [3, 5, 7, 9, 15, 33])
+def test_odd_magic_square_matches_siamese_walk(n):
+    assert np.array_equal(generate_magic_square(n), _legacy_magic_square(n))
+
+
+@pytest.mark.parametrize("size", [2, 12, 20, 63, 81, 100, 527])
+def test_magic_indices_match_argsort_order(size):
+    order = utils.generate_magic_indices(size)
+    assert np.array_equal(order, _legacy_magic_indices(size))
+    assert not order.flags.writeable
+
+
+@pytest.mark.parametrize("shape", [(3, 5), (7, 4), (9, 9), (12, 10)])
+@pytest.mark.parametrize("bpp", BPPS)
+def test_magic_engine_matches_bit_loop(shape, bpp):
+    channel = _channel(shape)
+    for n in _payload_sizes(shape, bpp):
+        payload = _payload(n)
+        expected = _legacy_magic_embed(channel, payload, bpp)
+        assert np.array_equal(engines.embed_payload(channel, payload, bpp, engine="magic"), expected)
+        assert np.array_equal(utils.embed_payload_in_channel(channel, payload, bpp), expected)
+
+
+def test_block_order_matches_split_blue_blocks():
+    channel = _channel((7, 5))
+    blocks, _ = image_ops.split_blue_blocks(channel)
+    expected = np.concatenate([b.ravel() for b in blocks])
+    assert np.array_equal(channel.ravel()[engines.ENGINES["blocks"].slot_order(channel.shape)], expected)
+
+
+# ---- slot kernel ----
+@pytest.mark.parametrize("bitorder", ["big", "little"])
+@pytest.mark.parametrize("lsb_count", [1, 2, 3, 4, 8])
+@pytest.mark.parametrize("use_slots", [True, False])
+def test_slot_kernel_round_trip(bitorder, lsb_count, use_slots):
+    rng = np.random.default_rng(lsb_count)
+    pixels = rng.integers(0, 256, 101, dtype=np.uint8)
+    slots = rng.permutation(101).astype(np.int32) if use_slots else None
+    for nbits in (0, 1, lsb_count * 50 + 1, lsb_count * 101):
+        bits = rng.integers(0, 2, nbits, dtype=np.uint8)
+        out = write_bits_to_slots(pixels.copy(), bits, lsb_count, slots=slots, bitorder=bitorder)
+        assert np.array_equal(read_bits_from_slots(out, nbits, lsb_count, slots=slots, bitorder=bitorder), bits)
+        touched = np.zeros(101, dtype=bool)
+        used = -(-nbits // lsb_count)
+        touched[slots[:used] if use_slots else slice(0, used)] = True
+        assert np.array_equal(out[~touched], pixels[~touched])
+
+
+@pytest.mark.parametrize("bitorder, kept", [("big", 0b0111), ("little", 0b1110)])
+def test_partial_trailing_slot_keeps_unused_bits(bitorder, kept):
+    pixels = np.full(2, 0b1111, dtype=np.uint8)
+    write_bits_to_slots(pixels, np.zeros(5, dtype=np.uint8), 4, bitorder=bitorder)
+    assert pixels[0] == 0 and pixels[1] == kept
+
+
+def test_slot_kernel_rejects_overflow():
+    with pytest.raises(ValueError):
+        write_bits_to_slots(np.zeros(2, dtype=np.uint8), np.ones(5, dtype=np.uint8), 2)
+    with pytest.raises(ValueError):
+        read_bits_from_slots(np.zeros(2, dtype=np.uint8), 5, 2)
+
+
+# ---- block helpers ----
+def test_embed_bits_in_blocks_round_trip_and_partial_chunk():
+    blocks, _ = image_ops.split_blue_blocks(_channel((9, 7)))
+    bits = np.random.default_rng(2).integers(0, 2, 3 * 20 + 2, dtype=np.uint8)
+    out = embed_bits_in_blocks(blocks, bits, 3)
+    assert np.array_equal(extract_bits_from_blocks(out, bits.size, 3), bits)
+    flat_in = np.concatenate([b.ravel() for b in blocks])
+    flat_out = np.concatenate([b.ravel() for b in out])
+    # the trailing chunk carries 2 bits: its lowest LSB is kept, not zero-padded
+    assert flat_out[20] & 1 == flat_in[20] & 1
+    assert np.array_equal(flat_out[21:], flat_in[21:])
+
+
+def test_embed_bits_in_blocks_empty_returns_copies():
+    blocks, _ = image_ops.split_blue_blocks(_channel((9, 7)))
+    out = embed_bits_in_blocks(blocks, np.zeros(0, dtype=np.uint8), 2)
+    assert all(np.array_equal(a, b) and a is not b for a, b in zip(out, blocks))
@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pytest
+from steg_utils import frames
+
+SHAPE = (24, 16)        # 48 bytes per frame at 1 bpp, minus the two headers
+
+
+def _frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, SHAPE + (3,), dtype=np.uint8) for _ in range(n)]
+
+
+def _message(n, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+
+@pytest.mark.parametrize("target", ["frames_dir", "stego.tif", "stego.png"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_round_trip_over_several_frames(tmp_path, target, workers):
+    out = str(tmp_path / target)
+    msg = _message(frames.frame_capacity(SHAPE) * 3 + 5)
+    assert frames.hide_frames(_frames(6), msg, "k", out, workers=workers) == 6
+    assert frames.reveal_frames(out, "k", workers=workers) == msg
+    if target == "frames_dir":
+        assert sorted(os.listdir(out)) == [f"frame_{i:05d}.png" for i in range(6)]
+    assert [p.name for p in tmp_path.iterdir()] == [target]       # no temporaries left behind
+
+
+@pytest.mark.parametrize("codec", ["webp", "npy"])
+def test_directory_frames_use_the_codec_extension(tmp_path, codec):
+    out = str(tmp_path / "frames_dir")
+    frames.hide_frames(_frames(2), b"codec frames", "k", out, codec=codec)
+    assert all(name.endswith("." + codec) for name in os.listdir(out))
+    assert frames.reveal_frames(out, "k") == b"codec frames"
+
+
+def test_frames_after_the_payload_are_unchanged(tmp_path):
+    out = str(tmp_path / "frames_dir")
+    source = _frames(4)
+    frames.hide_frames(source, b"fits in one frame", "k", out)
+    written = list(frames.iter_frames(out))
+    assert not np.array_equal(written[0], source[0])
+    assert all(np.array_equal(a, b) for a, b in zip(written[1:], source[1:]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_empty_message(tmp_path, workers):
+    out = str(tmp_path / "stego.tif")
+    assert frames.hide_frames(_frames(2), b"", "k", out, workers=workers) == 2
+    assert frames.reveal_frames(out, "k", workers=workers) == b""
+
+
+@pytest.mark.parametrize("target", ["frames_dir", "stego.tif", "stego.png"])
+def test_frames_too_small_leaves_no_output(tmp_path, target):
+    out = str(tmp_path / target)
+    msg = _message(frames.frame_capacity(SHAPE) * 2 + 1)
+    with pytest.raises(ValueError, match="Frames too small"):
+        frames.hide_frames(_frames(2), msg, "k", out, workers=2)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_run_keeps_an_existing_directory(tmp_path):
+    out = str(tmp_path / "frames_dir")
+    frames.hide_frames(_frames(2), b"first", "k", out)
+    with pytest.raises(ValueError, match="Frames too small"):
+        frames.hide_frames(_frames(2), _message(1000), "k", out)
+    assert frames.reveal_frames(out, "k") == b"first"
+
+
+def test_reveal_with_the_wrong_key(tmp_path):
+    out = str(tmp_path / "stego.tif")
+    frames.hide_frames(_frames(3), _message(40), "k", out)
+    with pytest.raises(ValueError):
+        frames.reveal_frames(out, "not the key")
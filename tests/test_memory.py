@@ -0,0 +1,43 @@
+import tracemalloc
+import numpy as np
+import pytest
+from steg_utils import engines, pipeline, utils
+
+SIDE = 256
+# Peak traced allocation of one full-capacity embed, as a multiple of the image size.
+LOW_MEMORY_PEAK_LIMIT = 1.5       # embed_array(low_memory=True), warm: one output copy + chunk temporaries
+INPLACE_PEAK_LIMIT = 0.5          # embed_array_inplace, warm: chunk temporaries only
+LOW_MEMORY_COLD_PEAK_LIMIT = 3.0  # + the visiting order, built chunk-wise into its final buffer
+INPLACE_COLD_PEAK_LIMIT = 2.0
+
+
+def _peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _cold_and_warm(fn, nbytes):
+    utils.clear_index_cache()
+    cold = _peak(fn) / nbytes
+    return cold, _peak(fn) / nbytes
+
+
+@pytest.mark.parametrize("engine", list(engines.ENGINES))
+@pytest.mark.parametrize("bpp", [1, 2])
+def test_low_memory_and_inplace_peaks(engine, bpp):
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, (SIDE, SIDE, 3), dtype=np.uint8)
+    cipher = rng.integers(0, 256, SIDE * SIDE * bpp // 8 - pipeline.HEADER_BYTES, dtype=np.uint8).tobytes()
+    work = rgb.copy()
+
+    cold, warm = _cold_and_warm(lambda: pipeline.embed_array(rgb, cipher, "mem", bpp, engine, low_memory=True),
+                                rgb.nbytes)
+    assert cold < LOW_MEMORY_COLD_PEAK_LIMIT and warm < LOW_MEMORY_PEAK_LIMIT, (cold, warm)
+
+    cold, warm = _cold_and_warm(lambda: pipeline.embed_array_inplace(work, cipher, "mem", bpp, engine), rgb.nbytes)
+    assert cold < INPLACE_COLD_PEAK_LIMIT and warm < INPLACE_PEAK_LIMIT, (cold, warm)
+    assert np.array_equal(work, pipeline.embed_array(rgb, cipher, "mem", bpp, engine))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+skm = pytest.importorskip("skimage.metrics")
+metrics = pytest.importorskip("metrics")
+
+
+def _cover(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def _stegos(cover, n, seed=1):
+    rng = np.random.default_rng(seed)
+    out = [cover.copy()]                                   # identical: PSNR inf, SSIM 1
+    for _ in range(n - 1):
+        out.append(cover ^ rng.integers(0, 4, cover.shape, dtype=np.uint8))
+    out.append(_cover(cover.shape, seed + 99))             # unrelated image
+    return out
+
+
+@pytest.mark.parametrize("shape", [(33, 29, 3), (20, 24), (7, 9, 3)])
+def test_cover_stats_match_skimage_and_direct_metrics(shape):
+    cover = _cover(shape)
+    stats = metrics.CoverStats(cover)
+    channel_axis = -1 if len(shape) == 3 else None
+    for stego in _stegos(cover, 4):
+        assert stats.mse(stego) == pytest.approx(metrics.mse(cover, stego), rel=1e-12, abs=1e-12)
+        assert stats.ncc(stego) == pytest.approx(metrics.ncc(cover, stego), rel=1e-9)
+        expected = skm.structural_similarity(cover, stego, channel_axis=channel_axis, data_range=255)
+        assert stats.ssim(stego) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+        assert metrics.ssim_index(stats, stego) == stats.ssim(stego)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 8])
+def test_score_batch_agrees_with_single_scores(batch_size):
+    cover = _cover((40, 36, 3))
+    stats = metrics.CoverStats(cover)
+    stegos = _stegos(cover, 6)
+    scores = stats.score_batch(stegos, batch_size=batch_size)
+    assert all(len(v) == len(stegos) for v in scores.values())
+    for i, stego in enumerate(stegos):
+        assert scores["MSE"][i] == pytest.approx(metrics.mse(cover, stego), abs=1e-12)
+        assert scores["RMSE"][i] == pytest.approx(metrics.rmse(cover, stego), abs=1e-12)
+        assert scores["PSNR"][i] == pytest.approx(metrics.psnr(cover, stego))
+        assert scores["NCC"][i] == pytest.approx(stats.ncc(stego), rel=1e-12)
+        assert scores["SSIM"][i] == pytest.approx(stats.ssim(stego), rel=1e-12)
+    assert scores["PSNR"][0] == np.inf and scores["SSIM"][0] == pytest.approx(1.0)
+
+
+def test_cover_stats_errors_and_empty_batch():
+    stats = metrics.CoverStats(_cover((16, 16, 3)))
+    with pytest.raises(ValueError, match="match the cover shape"):
+        stats.mse(_cover((16, 15, 3)))
+    with pytest.raises(ValueError, match="at least"):
+        metrics.CoverStats(_cover((6, 30, 3)))
+    assert all(v.size == 0 for v in stats.score_batch([]).values())
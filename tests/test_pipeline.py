@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from steg_utils import engines, magic_lsb, pipeline, utils
+
+
+def _rgb(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape + (3,), dtype=np.uint8)
+
+
+def _cipher(n, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+
+# ---- post-embed verification ----
+@pytest.mark.parametrize("engine", list(engines.ENGINES))
+@pytest.mark.parametrize("shape", [(64, 48), (34, 22)])
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_verify_passes_on_clean_embed(engine, shape, low_memory):
+    rgb = _rgb(shape)
+    cipher = _cipher(shape[0] * shape[1] * 2 // 8 - pipeline.HEADER_BYTES)
+    stego = pipeline.embed_array(rgb, cipher, "k", 2, engine, low_memory=low_memory, verify=True, workers=2)
+    assert np.array_equal(stego, pipeline.embed_array(rgb, cipher, "k", 2, engine))
+
+
+def test_verify_reads_the_returned_array(monkeypatch):
+    rgb = _rgb((40, 40))
+    real = utils.unshuffle_to_visual_with_indices
+
+    def corrupt(*args):
+        blue = real(*args).copy()
+        blue.flat[:] ^= 1
+        return blue
+
+    monkeypatch.setattr(utils, "unshuffle_to_visual_with_indices", corrupt)
+    with pytest.raises(RuntimeError, match="verification failed"):
+        pipeline.embed_array(rgb, _cipher(20), "k", verify=True)
+
+
+def test_verify_inplace_reads_the_returned_array(monkeypatch):
+    rgb = _rgb((40, 40))
+    real = magic_lsb.write_bits_to_slots
+
+    def misplaced(pixels, bits, lsb_count, slots=None, bitorder="big"):
+        real(pixels, bits, lsb_count, slots=slots[::-1].copy(), bitorder=bitorder)
+
+    monkeypatch.setattr(pipeline, "write_bits_to_slots", misplaced)
+    with pytest.raises(RuntimeError, match="verification failed"):
+        pipeline.embed_array_inplace(rgb, _cipher(20), "k", verify=True)
+
+
+# ---- reddiff payload mode ----
+def test_red_diff_matches_the_bytewise_definition():
+    red = _rgb((6, 5))[:, :, 0]
+    msg = _cipher(30, seed=4)
+    caldiff = pipeline.red_diff_encode(msg, red)
+    assert caldiff == bytes((m - r) % 256 for m, r in zip(msg, red.reshape(-1).tolist()))
+    assert pipeline.red_diff_decode(caldiff, red) == msg
+    with pytest.raises(ValueError, match="exceeds red pixel count"):
+        pipeline.red_diff_encode(_cipher(31), red)
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+@pytest.mark.parametrize("bpp", [1, 2])
+def test_reddiff_round_trip(low_memory, bpp):
+    cover = _rgb((48, 40))
+    msg = "reddiff message ✓".encode()
+    png = pipeline.hide(cover, msg, "k", bpp, mode="reddiff", low_memory=low_memory, verify=True)
+    assert pipeline.reveal(png, "k", bpp, mode="reddiff") == msg
+    assert pipeline.reveal(png, "k", bpp, mode="plain") != msg
+    assert pipeline.reveal_many(png, ["k"], bpp, mode="reddiff") == {"k": msg}
+
+
+def test_reddiff_leaves_red_untouched_and_rejects_unknown_modes():
+    cover = _rgb((32, 32))
+    stego = pipeline.to_rgb(pipeline.hide(cover, b"x" * 50, "k", mode="reddiff"))
+    assert np.array_equal(stego[:, :, 0], cover[:, :, 0])
+    with pytest.raises(ValueError, match="Unknown mode"):
+        pipeline.hide(cover, b"x", "k", mode="greendiff")
+
+
+# ---- multi-key extraction ----
+def _keys_by_perm(n_keys=60):
+    groups = {}
+    for i in range(n_keys):
+        groups.setdefault(tuple(utils.generate_perm_from_key(f"key{i}")), []).append(f"key{i}")
+    return groups
+
+
+def test_extract_many_matches_extract_array_and_reads_each_perm_once(monkeypatch):
+    groups = _keys_by_perm()
+    owner = next(members for members in groups.values() if len(members) > 1)
+    stego = pipeline.embed_array(_rgb((48, 40)), _cipher(30), owner[0], 2)
+    keys = [k for members in groups.values() for k in members] + owner     # duplicates collapse
+
+    calls = []
+    real = pipeline._extract_blue
+
+    def counting(blue, perm, *args):
+        calls.append(tuple(perm))
+        return real(blue, perm, *args)
+
+    monkeypatch.setattr(pipeline, "_extract_blue", counting)
+    out = pipeline.extract_many(stego, keys, 2)
+    assert sorted(calls) == sorted(groups) and list(out) == list(dict.fromkeys(keys))
+    for key in out:
+        try:
+            expected = pipeline.extract_array(stego, key, 2)
+        except ValueError:
+            expected = None
+        assert out[key] == expected
+    assert all(out[k] == _cipher(30) for k in owner)
+
+
+def test_extract_many_returns_none_for_implausible_headers():
+    saturated = np.full((32, 32, 3), 255, np.uint8)          # header 0xFFFFFFFF: unknown keystream tag
+    assert pipeline.extract_many(saturated, ["a", "b", "c"]) == {"a": None, "b": None, "c": None}
+    assert pipeline.reveal_many(saturated, ["a"]) == {"a": None}
+    odd = _rgb((33, 21))                                     # most permutations do not fit odd dimensions
+    out = pipeline.extract_many(odd, [f"key{i}" for i in range(40)])
+    assert None in out.values()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_reveal_many_decrypts_per_key(workers):
+    groups = _keys_by_perm()
+    owner, twin = next(members for members in groups.values() if len(members) > 1)[:2]
+    other = next(members[0] for perm, members in groups.items() if owner not in members)
+    png = pipeline.hide(_rgb((48, 40)), b"multi-key secret", owner, keystream="blake2b-ctr-v1")
+    out = pipeline.reveal_many(png, [owner, twin, other], workers=workers)
+    assert out[owner] == b"multi-key secret"
+    assert out[twin] not in (None, b"multi-key secret")      # same permutation, wrong decryption key
+    assert out == {key: _reveal_or_none(png, key) for key in out}
+    # a keystream that disagrees with the header tag counts as no payload
+    assert pipeline.reveal_many(png, [owner], keystream="sha256-ctr-v1", workers=workers) == {owner: None}
+
+
+def _reveal_or_none(stego, key):
+    try:
+        return pipeline.reveal(stego, key)
+    except ValueError:
+        return None
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+import pytest
+from steg_utils import encryption, engines, image_ops, pipeline, utils
+
+
+def _cover(shape=(64, 48), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape + (3,), dtype=np.uint8)
+
+
+def _cipher(message, key="k"):
+    return encryption.mle_encrypt(message, key)
+
+
+def _old_tail(stego, old, new, key="k"):
+    """Bytes of the old cipher stored past the end of the new payload."""
+    bits = (pipeline.HEADER_BYTES + len(old)) * 8
+    blue = utils.make_shuffled_blue(image_ops.flip_transpose(stego)[:, :, 2], utils.generate_perm_from_key(key))
+    raw = engines.extract_payload_bits(blue, bits, bits_per_pixel=1)
+    return raw[pipeline.HEADER_BYTES + len(new):]
+
+
+@pytest.mark.parametrize("bpp", [1, 3])
+def test_update_matches_a_fresh_embed_and_counts_changes(bpp):
+    cover = _cover()
+    stego = pipeline.embed_array(cover, _cipher(b"first message"), "k", bpp)
+    new = _cipher(b"second message!")
+    updated, stats = pipeline.update_array(stego, new, "k", bpp)
+    assert pipeline.extract_array(updated, "k", bpp) == new
+    assert np.array_equal(updated, pipeline.embed_array(cover, new, "k", bpp))
+    assert stats["old_length"] == 13 and stats["new_length"] == 15 and stats["stale_tail_slots"] == 0
+    assert 0 < stats["changed_slots"] <= stats["payload_slots"]
+    assert np.count_nonzero(updated != stego) == stats["changed_slots"]
+    again = pipeline.update_array(updated, new, "k", bpp)[1]
+    assert (again["changed_slots"], again["changed_bits"]) == (0, 0)
+
+
+def test_shorter_message_reports_and_scrubs_the_stale_tail():
+    old, new = _cipher(b"a much longer original message"), _cipher(b"short")
+    stego = pipeline.embed_array(_cover(), old, "k")
+    kept, stats = pipeline.update_array(stego, new, "k")
+    assert stats["stale_tail_slots"] == (len(old) - len(new)) * 8 and stats["scrubbed_slots"] == 0
+    assert _old_tail(kept, old, new) == old[len(new):]
+
+    scrubbed, stats = pipeline.update_array(stego, new, "k", scrub_tail=True, rng=np.random.default_rng(5))
+    assert stats["stale_tail_slots"] == 0 and stats["scrubbed_slots"] == (len(old) - len(new)) * 8
+    assert _old_tail(scrubbed, old, new) != old[len(new):]
+    assert pipeline.reveal(scrubbed, "k") == b"short"
+    # nothing past the old payload is touched
+    assert np.count_nonzero(scrubbed != kept) <= stats["scrubbed_slots"]
+
+
+def test_implausible_header_reports_unknown_tail():
+    _, stats = pipeline.update_array(np.zeros((32, 32, 3), np.uint8) + 255, _cipher(b"x"), "k", scrub_tail=True)
+    assert stats["old_length"] is None and stats["stale_tail_slots"] is None and stats["scrubbed_slots"] == 0
+
+
+def test_in_place_update_of_an_inv_flip_transpose_view():
+    stego = pipeline.embed_array(_cover(), _cipher(b"old"), "k")
+    assert not stego.flags.c_contiguous           # embed_array returns a view
+    base = stego.base
+    out, _ = pipeline.update_array(stego, _cipher(b"new message"), "k", in_place=True)
+    assert out is stego and stego.base is base
+    assert pipeline.reveal(stego, "k") == b"new message"
+
+
+def test_in_place_update_rejects_non_contiguous_arrays():
+    with pytest.raises(ValueError, match="C-contiguous"):
+        pipeline.update_array(_cover()[::2], _cipher(b"x"), "k", in_place=True)
+
+
+def test_update_file_patches_npy_through_a_memmap(tmp_path):
+    path = str(tmp_path / "stego.npy")
+    np.save(path, pipeline.embed_array(_cover(), _cipher(b"an older and longer message"), "k"))
+    stats = pipeline.update_file(path, b"rotated", "k", scrub_tail=True)
+    assert stats["changed_slots"] > 0 and stats["scrubbed_slots"] > 0
+    assert pipeline.reveal(np.load(path), "k") == b"rotated"
+
+
+def test_update_file_leaves_an_unchanged_png_alone(tmp_path):
+    path = str(tmp_path / "stego.png")
+    with open(path, "wb") as f:
+        f.write(pipeline.hide(_cover(), b"same message", "k"))
+    os.utime(path, ns=(1, 1))
+    stats = pipeline.update_file(path, b"same message", "k")
+    assert stats["changed_slots"] == 0 and os.stat(path).st_mtime_ns == 1
+
+    stats = pipeline.update_file(path, b"other message", "k")
+    assert stats["changed_slots"] > 0 and os.stat(path).st_mtime_ns != 1
+    assert pipeline.reveal(path, "k") == b"other message"